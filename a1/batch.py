@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import marriage
+
+"""
+Solves many instance files in one go with a pool of worker processes,
+so interpreter startup is paid once per worker instead of once per file.
+
+    python batch.py [--workers=N] [marriage.py options] directory|manifest
+
+A manifest is a text file with one instance file per line; blank lines and
+lines starting with # are skipped, and relative paths are taken from the
+manifest's directory. Results are written to stdout in input order, each
+file as a "# filename seconds" line followed by exactly what
+"python marriage.py filename" prints. A file marriage.py rejects gets
+"# filename failed" instead, and the exit status is 1.
+--stats is not taken, since every file would write its stats to the same
+place; run marriage.py on the files that need them.
+"""
+
+
+"""
+Lists the instance files in a directory or manifest.
+"""
+def instances(source):
+    if os.path.isdir(source):
+        names = sorted(os.listdir(source))
+        return [os.path.join(source, name) for name in names
+                if os.path.isfile(os.path.join(source, name))]
+
+    try:
+        with open(source) as manifest:
+            lines = [line.strip() for line in manifest]
+    except IOError:
+        exit(1)
+    base = os.path.dirname(source)
+    return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+"""
+Runs in a worker: solves one file and times it. Any error reading or
+solving the file only fails that file, so the rest of the batch still runs.
+@return filename, output (None if the file was rejected), seconds
+"""
+def run(filename, options):
+    start = time.perf_counter()
+    try:
+        output = marriage.solve(filename, options)
+    except (SystemExit, Exception):
+        output = None
+    return filename, output, time.perf_counter() - start
+
+
+"""
+Solves every file with a pool of workers, writing results to out as they
+come back, in input order.
+@return the number of files that were rejected
+"""
+def run_all(files, options=(), workers=None, out=sys.stdout):
+    failed = 0
+    workers = workers or os.cpu_count() or 1
+    # Hand out files a few at a time so workers are not waiting on the pool
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(workers) as pool:
+        for filename, output, seconds in pool.map(run, files, repeat(tuple(options)),
+                                                  chunksize=chunksize):
+            if output is None:
+                failed += 1
+                out.write("# %s failed\n" % filename)
+            else:
+                out.write("# %s %.6f\n" % (filename, seconds))
+                out.write(output)
+    return failed
+
+
+def main():
+    workers = None
+    options = []
+    sources = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            try:
+                workers = int(arg[len("--workers="):])
+            except ValueError:
+                exit(1)
+        elif arg.startswith("--"):
+            options.append(arg)
+        else:
+            sources.append(arg)
+    if any(option.split("=")[0] == "--stats" for option in options):
+        sys.stderr.write("batch.py does not take --stats; run marriage.py --stats on each file\n")
+        exit(1)
+    if len(sources) != 1 or not all(marriage.valid_option(option) for option in options):
+        exit(1)
+
+    if run_all(instances(sources[0]), options, workers):
+        exit(1)
+
+if __name__ == "__main__":
+    main()
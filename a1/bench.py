@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import generate
+import instrument
+import marriage
+import prefio
+
+"""
+Times the matching code on generated instances and writes a table.
+
+    python bench.py [--sizes=10,100,1000] [--kinds=random,worst]
+                    [--reference-max=1000] [--output=FILE]
+
+For each kind and size it times initiate() and stable() (the dictionary
+path and the O(n^3) reference), stable_fast() on the same dictionaries,
+and prefio.load() plus match() (what main() runs). stable() is only run
+up to --reference-max, since past that it takes hours; skipped cells are
+written as "-". Each step is timed as a phase of an instrument.Trace,
+the same timings marriage.py --stats reports, and each row is written
+(tab separated, under a header of COLUMNS) as soon as its instance is done.
+"""
+
+COLUMNS = ("kind", "n", "proposals", "initiate", "stable", "stable_fast", "load", "match")
+
+
+"""
+Benchmarks one generated instance.
+@return a dict with an entry for each of COLUMNS, timings as strings of seconds
+"""
+def measure(filename, kind, n, reference_max):
+    row = dict.fromkeys(COLUMNS, "-")
+    row["kind"], row["n"] = kind, n
+    trace = instrument.Trace()
+
+    with trace.phase("initiate"):
+        knights, ladies = marriage.initiate(filename)
+    with trace.phase("stable_fast"):
+        expected = marriage.stable_fast(knights, ladies)
+    if n <= reference_max:
+        with trace.phase("stable"):
+            partners = marriage.stable(knights, ladies)
+        if partners != expected:
+            raise AssertionError("stable() and stable_fast() disagree on %s n=%d" % (kind, n))
+    del knights, ladies
+
+    with trace.phase("load"):
+        k_names, l_names, k_prefs, l_rank = prefio.load(filename)
+    with trace.phase("match"):
+        l_partner = marriage.match(n, k_prefs, l_rank)
+    for name, seconds in trace.phases.items():
+        row[name] = "%.6f" % seconds
+    # Every knight asks everyone down to his partner, whatever the order
+    k_partner = [0] * n
+    for lady, knight in enumerate(l_partner):
+        k_partner[knight] = lady
+    row["proposals"] = sum(list(k_prefs[k * n:(k + 1) * n]).index(k_partner[k]) + 1 for k in range(n))
+    return row
+
+
+def run(sizes, kinds, reference_max, out):
+    out.write("\t".join(COLUMNS) + "\n")
+    for kind in kinds:
+        for n in sizes:
+            handle, filename = tempfile.mkstemp(suffix=".txt")
+            os.close(handle)
+            try:
+                generate.write(filename, kind, n)
+                row = measure(filename, kind, n, reference_max)
+            finally:
+                os.remove(filename)
+            out.write("\t".join(str(row[column]) for column in COLUMNS) + "\n")
+            out.flush()
+
+
+def main():
+    sizes = [10, 100, 1000, 5000]
+    kinds = list(generate.KINDS)
+    reference_max = 1000
+    output = None
+    try:
+        for arg in sys.argv[1:]:
+            option, _, value = arg.partition("=")
+            if option == "--sizes":
+                sizes = [int(size) for size in value.split(",")]
+            elif option == "--kinds" and all(kind in generate.KINDS for kind in value.split(",")):
+                kinds = value.split(",")
+            elif option == "--reference-max":
+                reference_max = int(value)
+            elif option == "--output":
+                output = value
+            else:
+                exit(1)
+    except ValueError:
+        exit(1)
+
+    if output is None:
+        run(sizes, kinds, reference_max, sys.stdout)
+    else:
+        with open(output, "w") as out:
+            run(sizes, kinds, reference_max, out)
+
+if __name__ == "__main__":
+    main()
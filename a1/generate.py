@@ -0,0 +1,80 @@
+import random
+import sys
+
+"""
+Writes synthetic instances in the preference format marriage.py reads.
+
+    python generate.py random|correlated|worst n output [seed]
+
+random      every list is an independent shuffle
+correlated  everyone on a side roughly agrees on who is best: each list
+            sorts a shared score per person plus some personal noise
+worst       the lists that make Gale-Shapley take n^2 - n + 1 proposals,
+            the most it can ever need: knight i < n-1 goes round the first
+            n-1 ladies starting at lady i, with the last lady at the end
+            of every list, and lady j puts knight j+1 first and the last
+            knight second, so each knight is turned down by all but one
+"""
+
+KINDS = ("random", "correlated", "worst")
+
+
+"""
+The lists of one side, one at a time so big instances never sit in memory.
+@param  kind - one of KINDS
+@param  others - the names on the other side
+@param  rng - a random.Random
+@param  ladies - whether these are the ladies' lists (only "worst" cares)
+"""
+def lists(kind, others, rng, ladies=False, noise=0.3):
+    n = len(others)
+    if kind == "random":
+        for i in range(n):
+            prefs = list(others)
+            rng.shuffle(prefs)
+            yield prefs
+    elif kind == "correlated":
+        score = [rng.random() for _ in range(n)]
+        for i in range(n):
+            keys = [s + noise * rng.random() for s in score]
+            yield [others[j] for j in sorted(range(n), key=keys.__getitem__)]
+    elif kind == "worst":
+        m = n - 1
+        for i in range(n):
+            if ladies:
+                # Knight i+1, the last knight, then knights i, i-1, ... round the rest
+                order = [(i + 1) % m if m else 0, m] + [(i - t) % m for t in range(m - 1)]
+            else:
+                # Ladies i, i+1, ... round the first n-1 (the last knight from 0), then the last
+                order = [(i % m + t) % m for t in range(m)] + [m]
+            yield [others[j] for j in order[:n]]
+    else:
+        raise ValueError("unknown kind: " + kind)
+
+
+"""
+Writes an instance of the given kind and size.
+"""
+def write(filename, kind, n, seed=0):
+    rng = random.Random(seed)
+    k_names = ["K%d" % i for i in range(n)]
+    l_names = ["L%d" % i for i in range(n)]
+    with open(filename, "w") as output_file:
+        output_file.write("%d\n" % n)
+        for names, others, ladies in ((k_names, l_names, False), (l_names, k_names, True)):
+            for name, prefs in zip(names, lists(kind, others, rng, ladies)):
+                output_file.write(name + " " + " ".join(prefs) + "\n")
+
+
+def main():
+    if len(sys.argv) not in (4, 5) or sys.argv[1] not in KINDS:
+        exit(1)
+    try:
+        n = int(sys.argv[2])
+        seed = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+    except ValueError:
+        exit(1)
+    write(sys.argv[3], sys.argv[1], n, seed)
+
+if __name__ == "__main__":
+    main()
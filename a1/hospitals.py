@@ -0,0 +1,164 @@
+import mmap
+import sys
+from array import array
+from collections import deque
+from heapq import heappush, heapreplace
+import prefio
+
+"""
+Many-to-one matching: residents propose to hospitals, and each hospital
+keeps up to its capacity of residents, so nobody has to be copied once
+per place. The input is marriage.py's format with a capacity added:
+    num_residents num_hospitals
+    resident hospital hospital ...             (one line per resident)
+    hospital capacity resident resident ...    (one line per hospital)
+Lists do not have to be complete; a resident and a hospital can only be
+matched if each is on the other's list.
+Residents' lists are kept as one flat array of hospital ids, with
+r_start[res] .. r_start[res + 1] marking each resident's part. r_rank runs
+alongside it: r_rank[i] is where hospital r_prefs[i] ranks that resident,
+or -1 if it does not rank him at all, so a hospital's ranks take no more
+room than the residents' lists do.
+"""
+
+
+"""
+Streams a hospitals/residents file, with the same checks as
+prefio.read_text(): the header, the line count, and that every name and
+capacity makes sense. It will exit(1) if any of these are not true.
+@param  filename - the input file
+@return r_names, h_names, r_prefs, r_start, r_rank, capacity
+"""
+def read(filename):
+    try:
+        input_file = open(filename, "rb")
+    except IOError:
+        exit(1)
+
+    with input_file:
+        try:
+            mm = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            exit(1)
+        with mm:
+            return parse(mm)
+
+
+"""
+Does the work of read() on an already mapped file.
+"""
+def parse(mm):
+    starts = prefio.line_starts(mm)
+    try:
+        num_residents, num_hospitals = map(int, mm[starts[0]:starts[1]].split())
+    except ValueError:
+        exit(1)
+    if len(starts) - 1 != num_residents + num_hospitals + 1:
+        exit(1)
+
+    first = 1 + num_residents
+    h_ids = {}
+    for h in range(num_hospitals):
+        h_ids[prefio.line_tokens(mm, starts, first + h)[0]] = h
+
+    r_ids = {}
+    r_prefs = array(prefio.typecode(num_hospitals))
+    r_start = array("q", [0])
+    # Where each (resident, hospital) pair sits in r_prefs
+    slot = {}
+    capacity = array("i", [0]) * num_hospitals
+
+    try:
+        for res in range(num_residents):
+            line = prefio.line_tokens(mm, starts, 1 + res)
+            r_ids[line[0]] = res
+            for name in line[1:]:
+                hosp = h_ids[name]
+                slot[res * num_hospitals + hosp] = len(r_prefs)
+                r_prefs.append(hosp)
+            r_start.append(len(r_prefs))
+        r_rank = array("i", [-1]) * len(r_prefs)
+
+        for h in range(num_hospitals):
+            line = prefio.line_tokens(mm, starts, first + h)
+            capacity[h] = int(line[1])
+            # A resident ranked twice would have the second rank overwrite the first
+            if capacity[h] < 0 or len(set(line[2:])) != len(line) - 2:
+                exit(1)
+            for rank, name in enumerate(line[2:]):
+                i = slot.get(r_ids[name] * num_hospitals + h)
+                if i is not None:
+                    r_rank[i] = rank
+    except (KeyError, IndexError, ValueError):
+        exit(1)
+
+    # Somebody listed twice, or on the same list twice
+    if len(r_ids) != num_residents or len(h_ids) != num_hospitals or len(slot) != len(r_prefs):
+        exit(1)
+
+    r_names = [name.decode() for name in sorted(r_ids, key=r_ids.get)]
+    h_names = [name.decode() for name in sorted(h_ids, key=h_ids.get)]
+    return r_names, h_names, r_prefs, r_start, r_rank, capacity
+
+
+"""
+Resident-proposing deferred acceptance. Each hospital holds its current
+residents in a max-heap keyed by rank, bounded by its capacity, so the
+resident it likes least is always on top to be checked or replaced.
+@param  r_prefs, r_start, r_rank, capacity - as built by read()
+@return a list where entry res is the id of resident res's hospital, or
+        -1 if he did not get one
+"""
+def match(r_prefs, r_start, r_rank, capacity):
+    num_residents = len(r_start) - 1
+    # Heaps of (-rank, resident)
+    holds = [[] for _ in range(len(capacity))]
+    nxt = r_start[:-1].tolist()
+    free = deque(range(num_residents))
+
+    while free:
+        res = free.popleft()
+        end = r_start[res + 1]
+        # Keep asking down his list until somebody keeps him, or he runs out
+        while nxt[res] < end:
+            i = nxt[res]
+            nxt[res] += 1
+            rank = r_rank[i]
+            if rank == -1:
+                continue
+            hosp = r_prefs[i]
+            heap = holds[hosp]
+            if len(heap) < capacity[hosp]:
+                heappush(heap, (-rank, res))
+                break
+            if heap and rank < -heap[0][0]:
+                # Full, but he beats the worst one there
+                free.append(heapreplace(heap, (-rank, res))[1])
+                break
+
+    r_partner = [-1] * num_residents
+    for hosp, heap in enumerate(holds):
+        for rank, res in heap:
+            r_partner[res] = hosp
+    return r_partner
+
+
+def main():
+    if len(sys.argv) != 2:
+        exit(1)
+
+    r_names, h_names, r_prefs, r_start, r_rank, capacity = read(sys.argv[1])
+    r_partner = match(r_prefs, r_start, r_rank, capacity)
+
+    # Each hospital's residents, best first
+    assigned = [[] for _ in h_names]
+    for res, hosp in enumerate(r_partner):
+        if hosp != -1:
+            i = r_start[res] + r_prefs[r_start[res]:r_start[res + 1]].index(hosp)
+            assigned[hosp].append((r_rank[i], res))
+    for hosp, residents in enumerate(assigned):
+        for rank, res in sorted(residents):
+            sys.stdout.write(r_names[res] + " " + h_names[hosp] + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import time
+from contextlib import contextmanager
+
+"""
+Opt-in instrumentation for the matching engines. Pass a Trace to
+marriage.match() or rank_matrix.match() to find out where a run spends
+its time; without one they run their usual loops and pay nothing for it.
+"""
+
+
+class Trace:
+    def __init__(self):
+        # Per knight, filled in by the engines
+        self.proposals = []
+        self.rejections = []
+        self.breakups = []
+        # (proposals so far, knights waiting) each time a knight gets a turn,
+        # or once per round for rank_matrix.match()
+        self.queue = []
+        # Seconds spent in each phase, in the order they ran
+        self.phases = {}
+
+    """
+    Times the body of a with statement as the named phase.
+    """
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    """
+    Fills in the per-knight counts once a match is done. Every proposal is
+    either turned down straight away or accepted, and every accepted one
+    but the last was later broken up.
+    @param  nxt - how far down his list each knight got
+    @param  breakups - how many times each knight was left for someone else
+    """
+    def finish(self, nxt, breakups):
+        self.proposals = list(nxt)
+        self.breakups = list(breakups)
+        self.rejections = [p - b - 1 for p, b in zip(self.proposals, self.breakups)]
+
+    def to_dict(self, k_names=None):
+        result = {"phases": self.phases,
+                  "total_proposals": sum(self.proposals),
+                  "queue": self.queue}
+        for field in ("proposals", "rejections", "breakups"):
+            counts = getattr(self, field)
+            result[field] = dict(zip(k_names, counts)) if k_names is not None else counts
+        return result
+
+    def to_json(self, k_names=None):
+        return json.dumps(self.to_dict(k_names))
+
+
+"""
+marriage.propose() with the bookkeeping for a Trace, kept apart so the
+plain loop stays as it is.
+@return the number of proposals made
+"""
+def propose(n, k_prefs, l_rank, l_partner, free, nxt, trace):
+    proposals = 0
+    breakups = [0] * n
+    queue = trace.queue
+    while free:
+        queue.append((proposals, len(free)))
+        knight = free.popleft()
+        row = knight * n
+        while True:
+            lady = k_prefs[row + nxt[knight]]
+            nxt[knight] += 1
+            proposals += 1
+            engaged = l_partner[lady]
+            if engaged == -1:
+                l_partner[lady] = knight
+                break
+            base = lady * n
+            if l_rank[base + knight] < l_rank[base + engaged]:
+                l_partner[lady] = knight
+                free.append(engaged)
+                breakups[engaged] += 1
+                break
+    trace.finish(nxt, breakups)
+    return proposals
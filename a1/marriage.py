@@ -1,19 +1,26 @@
 import sys
+from array import array
+from collections import deque
+from contextlib import contextmanager
+import prefio
 
 """
 All of the exception handling for the file format.
 It will check that there are enough arguments, a valid input file, that the first line is an int,
 there are enough lines, and that there are enough names in each line.
 It will exit(1) if any of these conditions are not true
+@param  filename - the input file, taken from the command line if not given
 """
-def file_handling():
-    # Check to see if there are enough arguments provided
-    if len(sys.argv) != 2:
-        exit(1)
+def file_handling(filename=None):
+    if filename is None:
+        # Check to see if there are enough arguments provided
+        if len(sys.argv) != 2:
+            exit(1)
+        filename = sys.argv[1]
 
     # Open input file from the command line
     try:
-        input_file = open(sys.argv[1], "r")
+        input_file = open(filename, "r")
     except IOError:
         exit(1)
 
@@ -41,10 +48,21 @@ handled by checking to see if the name is in the dictionary already and
 writing to stderr.
 
 @param num_people - to know when to separate the lists
+@param filename - a text file for file_handling(), or a binary file from prefio.py
 @return knights and ladies dictionaries 
 """
-def initiate():
-    num_people, lines = file_handling()
+def initiate(filename=None):
+    if filename is None:
+        # Check to see if there are enough arguments provided
+        if len(sys.argv) != 2:
+            exit(1)
+        filename = sys.argv[1]
+
+    # Binary files already hold ids, so just turn them back into names
+    if prefio.is_binary(filename):
+        return prefio.to_dicts(*prefio.read_binary(filename))
+
+    num_people, lines = file_handling(filename)
 
     # Create knights and ladies dictionaries that will hold names and preferences
     knights = {}
@@ -86,6 +104,8 @@ def check_pref(knight, engaged, l_pref):
 
 """
 Makes sure the marriage is stable
+This is the original O(n^3) version, kept as the reference for stable_fast().
+Note: it pops from the knights' preference lists as it goes.
 @param  knights, ladies - dictionaries
 @return a list of the knight the lady says yes to
 """
@@ -121,11 +141,350 @@ def stable(knights, ladies):
     return l_partner
 
 
+"""
+Maps every name to an integer id once so the matching loop never has to
+touch strings. Knights and ladies are numbered in the order they appear in
+the file. Preferences are stored row by row in flat arrays of n * n ids:
+k_prefs[k * n + i] is the lady knight k ranks i-th, and
+l_rank[l * n + k] is where lady l ranks knight k (0 is her favorite).
+Exits with 1 if a preference names someone who is not on the other side.
+@param  knights, ladies - dictionaries
+@return k_names, l_names, k_prefs, l_rank
+"""
+def index(knights, ladies):
+    n = len(knights)
+    k_names = list(knights)
+    l_names = list(ladies)
+    k_ids = {name: i for i, name in enumerate(k_names)}
+    l_ids = {name: i for i, name in enumerate(l_names)}
+
+    try:
+        # Knights keep their lists in order, just as ids
+        k_prefs = array("i")
+        for name in k_names:
+            k_prefs.extend([l_ids[lady] for lady in knights[name]])
+
+        # Ladies get the inverse table so "who does she like more" is one lookup
+        l_rank = array("i", [0]) * (n * n)
+        for l, name in enumerate(l_names):
+            base = l * n
+            for rank, knight in enumerate(ladies[name]):
+                l_rank[base + k_ids[knight]] = rank
+    except KeyError:
+        exit(1)
+
+    return k_names, l_names, k_prefs, l_rank
+
+
+"""
+Runs proposals from the knights in free until everyone is engaged.
+nxt[k] is the position in knight k's list of the next lady he will ask,
+and l_partner[l] is the knight lady l is holding (-1 if she is free).
+Both are updated in place.
+@param  n, k_prefs, l_rank - as built by index()
+@return the number of proposals made
+"""
+def propose(n, k_prefs, l_rank, l_partner, free, nxt):
+    proposals = 0
+    while free:
+        knight = free.popleft()
+        row = knight * n
+        # Keep asking down his list until somebody says yes
+        while True:
+            lady = k_prefs[row + nxt[knight]]
+            nxt[knight] += 1
+            proposals += 1
+            engaged = l_partner[lady]
+            if engaged == -1:
+                l_partner[lady] = knight
+                break
+            base = lady * n
+            # She prefers the knight over her current partner so break them up
+            if l_rank[base + knight] < l_rank[base + engaged]:
+                l_partner[lady] = knight
+                free.append(engaged)
+                break
+    return proposals
+
+
+"""
+Gale-Shapley on integer ids. Each proposal is O(1), so the whole match
+is O(n^2) instead of the O(n^3) of stable().
+@param  n, k_prefs, l_rank - as built by index()
+@param  trace - an instrument.Trace to fill in, if wanted
+@return a list where entry l is the id of the knight lady l says yes to
+"""
+def match(n, k_prefs, l_rank, trace=None):
+    l_partner = [-1] * n
+    if trace is None:
+        propose(n, k_prefs, l_rank, l_partner, deque(range(n)), [0] * n)
+    else:
+        import instrument
+        instrument.propose(n, k_prefs, l_rank, l_partner, deque(range(n)), [0] * n, trace)
+    return l_partner
+
+
+"""
+Adds to suitors the proposals made since the pointers were before:
+knight k has asked the ladies at positions before[k] to nxt[k] - 1 since.
+@return the ids of the knights who proposed
+"""
+def add_suitors(n, k_prefs, suitors, before, nxt):
+    moved = [knight for knight in range(n) if nxt[knight] != before[knight]]
+    for knight in moved:
+        row = knight * n
+        for lady in k_prefs[row + before[knight]:row + nxt[knight]]:
+            suitors[lady].append(knight)
+    return moved
+
+
+"""
+match(), keeping what rematch() needs to carry on from the result.
+@param  n, k_prefs, l_rank - as built by index()
+@return l_partner, k_partner, nxt, suitors - the knight each lady says yes
+        to, the lady each knight ends up with, each knight's next-proposal
+        pointer (one past his partner), and for each lady the knights who
+        asked her
+"""
+def match_state(n, k_prefs, l_rank):
+    l_partner = [-1] * n
+    nxt = [0] * n
+    propose(n, k_prefs, l_rank, l_partner, deque(range(n)), nxt)
+    k_partner = [-1] * n
+    for lady, knight in enumerate(l_partner):
+        k_partner[knight] = lady
+    suitors = [[] for _ in range(n)]
+    add_suitors(n, k_prefs, suitors, [0] * n, nxt)
+    return l_partner, k_partner, nxt, suitors
+
+
+"""
+Finds where lady is in knight's list, looking only at the first limit
+entries so the cost is how far down his list we need to go.
+@return her position, or -1 if she is not in the first limit
+"""
+def position(n, k_prefs, knight, lady, limit):
+    row = knight * n
+    try:
+        return k_prefs[row:row + limit].index(lady)
+    except ValueError:
+        return -1
+
+
+"""
+Repairs a matching after some people changed their preference lists,
+instead of matching everyone again.
+Knights whose own lists changed are released and start over. Then every
+lady who might now take a knight she turned down before (because her
+ranking changed, or because she lost her partner) looks through the
+knights who asked her, best first by her ranking: the best one she prefers
+to her partner who is still with someone he likes less comes back to her,
+and that knight's old lady is then in the same position, and so on. Any
+free knight ahead of him just gets to ask her again. After that the usual
+proposals run from where everyone is, so only knights affected by the
+changes do any work.
+The result is a stable matching for the new lists, but when the old
+matching is far from the new one it need not be the same stable matching
+a full match() would find.
+@param  n, k_prefs, l_rank - the new lists, as built by index()
+@param  l_partner, k_partner, nxt, suitors - the previous result of
+        match_state() or rematch(), all updated in place
+@param  changed_knights, changed_ladies - ids of the people whose lists changed
+@return the work done: proposals, ladies and suitors looked at while
+        repairing, and n for finding the knights whose partners changed,
+        so it compares with the proposals of a full match()
+"""
+def rematch(n, k_prefs, l_rank, l_partner, k_partner, nxt, suitors,
+            changed_knights=(), changed_ladies=()):
+    free = deque()
+    # Ladies who might now take a knight that was turned down before
+    upset = deque(changed_ladies)
+    work = n
+
+    for knight in changed_knights:
+        lady = k_partner[knight]
+        nxt[knight] = 0
+        if lady != -1:
+            l_partner[lady] = -1
+            k_partner[knight] = -1
+            upset.append(lady)
+            free.append(knight)
+
+    while upset:
+        lady = upset.popleft()
+        engaged = l_partner[lady]
+        base = lady * n
+        limit = l_rank[base + engaged] if engaged != -1 else n
+        work += 1
+
+        # Knights who asked her, best first by her ranking, as far as her partner;
+        # a knight who has gone back up his list past her since is skipped
+        for knight in sorted(suitors[lady], key=lambda knight: l_rank[base + knight]):
+            work += 1
+            if l_rank[base + knight] >= limit:
+                break
+            i = position(n, k_prefs, knight, lady, nxt[knight])
+            if i == -1 or k_partner[knight] == lady:
+                continue
+            if k_partner[knight] == -1:
+                # Free, so he goes back and asks her again
+                nxt[knight] = i
+                continue
+            # He went on to someone he likes less, so he comes back to her
+            old = k_partner[knight]
+            l_partner[old] = -1
+            upset.append(old)
+            l_partner[lady] = knight
+            k_partner[knight] = lady
+            nxt[knight] = i + 1
+            if engaged != -1:
+                k_partner[engaged] = -1
+                free.append(engaged)
+            break
+
+    before = nxt[:]
+    work += propose(n, k_prefs, l_rank, l_partner, free, nxt)
+    # Only knights who proposed again can have a new partner
+    for knight in add_suitors(n, k_prefs, suitors, before, nxt):
+        k_partner[knight] = k_prefs[knight * n + nxt[knight] - 1]
+    return work
+
+
+"""
+rematch() for the dictionaries from initiate().
+@param  knights, ladies - the new dictionaries
+@param  partners - the previous result of stable() or stable_fast()
+@param  changed_knights, changed_ladies - names of the people whose lists changed
+@return a dict of the knight each lady says yes to
+"""
+def restable(knights, ladies, partners, changed_knights=(), changed_ladies=()):
+    k_names, l_names, k_prefs, l_rank = index(knights, ladies)
+    n = len(k_names)
+    k_ids = {name: i for i, name in enumerate(k_names)}
+    l_ids = {name: i for i, name in enumerate(l_names)}
+
+    l_partner = [k_ids[partners[lady]] for lady in l_names]
+    k_partner = [-1] * n
+    for lady, knight in enumerate(l_partner):
+        k_partner[knight] = lady
+    # Every knight asked everyone down to his partner, so he is one past her
+    # (the pointers of knights whose lists changed are reset anyway)
+    nxt = [position(n, k_prefs, knight, k_partner[knight], n) + 1 for knight in range(n)]
+    suitors = [[] for _ in range(n)]
+    add_suitors(n, k_prefs, suitors, [0] * n, nxt)
+    rematch(n, k_prefs, l_rank, l_partner, k_partner, nxt, suitors,
+            [k_ids[name] for name in changed_knights], [l_ids[name] for name in changed_ladies])
+    return {lady: k_names[knight] for lady, knight in zip(l_names, l_partner)}
+
+
+"""
+Same answer as stable(), but built on match(). Unlike stable() it leaves
+the knights' preference lists alone.
+@param  knights, ladies - dictionaries
+@return a dict of the knight each lady says yes to
+"""
+def stable_fast(knights, ladies):
+    k_names, l_names, k_prefs, l_rank = index(knights, ladies)
+    l_partner = match(len(k_names), k_prefs, l_rank)
+    return {lady: k_names[knight] for lady, knight in zip(l_names, l_partner)}
+
+
+# Command line options, given before or after the input file
+#   --numpy   match with the NumPy backend in rank_matrix.py
+#   --peak    report the peak memory used reading the file on stderr
+#   --verify  check the result for blocking pairs, listing any on stderr
+#   --stats=FILE  write proposal counts and phase timings to FILE as JSON;
+#                 the parse phase includes building the id arrays, since
+#                 prefio reads the file straight into them
+OPTIONS = ("--numpy", "--peak", "--verify")
+STATS = "--stats="
+
+USAGE = "usage: python marriage.py [--numpy] [--peak] [--verify] [--stats=FILE] filename\n"
+
+
+"""
+Checks a command line option: one of OPTIONS exactly, or --stats= and a file name.
+@return True if main() takes it
+"""
+def valid_option(option):
+    return option in OPTIONS or (option.startswith(STATS) and len(option) > len(STATS))
+
+
+"""
+Stands in for Trace.phase() when nothing is being recorded.
+"""
+@contextmanager
+def no_phase(name):
+    yield
+
+
+"""
+Reads and matches a single instance file.
+@param  filename, options - the input file and command line options
+@return everything main() prints for it, one "knight lady" line per lady
+"""
+def solve(filename, options=()):
+    stats = [option[len(STATS):] for option in options if option.startswith(STATS)]
+    if stats:
+        import instrument
+        trace = instrument.Trace()
+        phase = trace.phase
+    else:
+        trace = None
+        phase = no_phase
+
+    # Stream or map the file straight into id arrays instead of building dicts,
+    # so this is the index build as well
+    with phase("parse"):
+        if "--peak" in options:
+            instance, peak = prefio.peak_memory(prefio.load, filename)
+            sys.stderr.write("peak memory: %d bytes\n" % peak)
+        else:
+            instance = prefio.load(filename)
+    k_names, l_names, k_prefs, l_rank = instance
+    n = len(k_names)
+
+    if "--numpy" in options:
+        # Only needs NumPy when asked for
+        import rank_matrix
+        with phase("index"):
+            matrices = rank_matrix.wrap(n, k_prefs, l_rank)
+        with phase("match"):
+            l_partner = rank_matrix.match(*matrices, trace=trace).tolist()
+    else:
+        with phase("match"):
+            l_partner = match(n, k_prefs, l_rank, trace)
+
+    if "--verify" in options:
+        import rank_matrix
+        import stability
+        with phase("verify"):
+            pairs = stability.blocking_pairs(*rank_matrix.wrap(n, k_prefs, l_rank), l_partner=l_partner)
+        if len(pairs[0]):
+            for knight, lady in zip(*pairs):
+                sys.stderr.write("blocking pair: " + k_names[knight] + " " + l_names[lady] + "\n")
+            exit(1)
+
+    with phase("output"):
+        output = "".join(k_names[knight] + " " + lady + "\n" for lady, knight in zip(l_names, l_partner))
+
+    if trace is not None:
+        try:
+            with open(stats[-1], "w") as stats_file:
+                stats_file.write(trace.to_json(k_names))
+        except IOError:
+            exit(1)
+    return output
+
+
 def main():
-    knights, ladies = initiate()
-    partners = stable(knights, ladies)
-    for lady, knight in partners.items():
-         sys.stdout.write(knight + " " + lady + "\n")
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    files = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(files) != 1 or not all(valid_option(option) for option in options):
+        sys.stderr.write(USAGE)
+        exit(1)
+
+    sys.stdout.write(solve(files[0], options))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,299 @@
+import mmap
+import struct
+import sys
+import tracemalloc
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+Readers for the preference file format used by marriage.py that never hold
+the whole file as Python strings. The file is memory-mapped, lines are
+parsed one at a time, and names go straight into ids in typed arrays:
+k_prefs[k * n + i] is the lady knight k ranks i-th and l_rank[l * n + k]
+is where lady l ranks knight k, the same layout as marriage.index().
+
+There is also a binary format holding exactly those two tables, so big
+instances do not have to be parsed again on every run:
+    header   MAGIC, n, bytes per id (2 or 4), size of the name table
+    names    the knights' then the ladies' names, one per line, UTF-8,
+             padded with zeros to a multiple of 8 bytes
+    k_prefs  n * n little-endian uint16 or uint32
+    l_rank   n * n little-endian uint16 or uint32
+"""
+
+MAGIC = b"GSPREFS\x01"
+HEADER = struct.Struct("<8sIIQ")
+
+
+"""
+Picks the smallest array typecode that can hold ids 0 .. n - 1.
+"""
+def typecode(n):
+    return "H" if n <= 0x10000 else "i"
+
+
+"""
+Finds where each line of a mapped file starts, the same way readlines()
+would split it, so the last line counts even without a trailing newline.
+@return an array of line offsets, with the file size added on the end
+"""
+def line_starts(mm):
+    starts = array("q", [0])
+    size = len(mm)
+    pos = mm.find(b"\n")
+    while pos != -1 and pos + 1 < size:
+        starts.append(pos + 1)
+        pos = mm.find(b"\n", pos + 1)
+    starts.append(size)
+    return starts
+
+
+"""
+Reads line i of a mapped file, without its newline, split on spaces.
+"""
+def line_tokens(mm, starts, i):
+    line = mm[starts[i]:starts[i + 1]]
+    if line.endswith(b"\n"):
+        line = line[:-1]
+    return line.split(b" ")
+
+
+"""
+Streams a text preference file into typed arrays.
+Keeps the checks of marriage.file_handling() and marriage.initiate(): the
+first line is an int, there are 2 * n + 1 lines and everyone lists n names.
+It also exits(1) on repeated names or a preference for someone who is not
+on the other side, which would otherwise only show up as a crash later.
+@param  filename - the input file
+@return k_names, l_names, k_prefs, l_rank
+"""
+def read_text(filename):
+    try:
+        input_file = open(filename, "rb")
+    except IOError:
+        exit(1)
+
+    with input_file:
+        try:
+            mm = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            exit(1)
+        with mm:
+            return parse_text(mm)
+
+
+"""
+Does the work of read_text() on an already mapped file.
+"""
+def parse_text(mm):
+    starts = line_starts(mm)
+
+    try:
+        num_people = int(mm[starts[0]:starts[1]])
+    except ValueError:
+        exit(1)
+    n = num_people
+
+    if len(starts) - 1 != n * 2 + 1:
+        exit(1)
+
+    # First pass over the ladies' lines only, to learn their names
+    l_ids = {}
+    for l in range(n):
+        l_ids[line_tokens(mm, starts, n + 1 + l)[0]] = l
+
+    code = typecode(n)
+    k_ids = {}
+    k_prefs = array(code)
+    l_rank = array(code, [0]) * (n * n)
+
+    try:
+        for k in range(n):
+            line = line_tokens(mm, starts, 1 + k)
+            if len(line) - 1 != n:
+                exit(1)
+            k_ids[line[0]] = k
+            k_prefs.extend([l_ids[lady] for lady in line[1:]])
+
+        for l in range(n):
+            line = line_tokens(mm, starts, n + 1 + l)
+            if len(line) - 1 != n:
+                exit(1)
+            base = l * n
+            for rank, knight in enumerate(line[1:]):
+                l_rank[base + k_ids[knight]] = rank
+    except KeyError:
+        exit(1)
+
+    if len(k_ids) != n or len(l_ids) != n:
+        exit(1)
+
+    k_names = sorted(k_ids, key=k_ids.get)
+    l_names = sorted(l_ids, key=l_ids.get)
+    return [name.decode() for name in k_names], [name.decode() for name in l_names], k_prefs, l_rank
+
+
+"""
+Checks the first bytes of a file for the binary format's MAGIC.
+"""
+def is_binary(filename):
+    try:
+        with open(filename, "rb") as input_file:
+            return input_file.read(len(MAGIC)) == MAGIC
+    except IOError:
+        return False
+
+
+"""
+Loads a binary preference file. The tables are memoryviews straight onto
+the mapped file, so nothing is copied or parsed beyond the name table.
+Exits with 1 if the file is not a well formed binary preference file,
+and raises ValueError if a row of either table is not a permutation of
+the ids 0 .. n - 1.
+@param  filename - the input file
+@return k_names, l_names, k_prefs, l_rank
+"""
+def read_binary(filename):
+    try:
+        input_file = open(filename, "rb")
+    except IOError:
+        exit(1)
+
+    with input_file:
+        try:
+            mm = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            exit(1)
+
+    try:
+        magic, n, itemsize, names_size = HEADER.unpack_from(mm)
+    except struct.error:
+        exit(1)
+    table = n * n * itemsize
+    start = HEADER.size + names_size
+    if magic != MAGIC or itemsize not in (2, 4) or len(mm) != start + 2 * table:
+        exit(1)
+
+    names = mm[HEADER.size:start].rstrip(b"\0").decode().split("\n") if n else []
+    if len(names) != 2 * n:
+        exit(1)
+
+    code = "H" if itemsize == 2 else "I"
+    view = memoryview(mm)
+    k_prefs = view[start:start + table].cast(code)
+    l_rank = view[start + table:start + 2 * table].cast(code)
+    if sys.byteorder == "big":
+        # The file is little-endian, so this is the one case that has to copy
+        k_prefs, l_rank = array(code, k_prefs), array(code, l_rank)
+        k_prefs.byteswap()
+        l_rank.byteswap()
+
+    for table in (k_prefs, l_rank):
+        bad = bad_row(n, table)
+        if bad != -1:
+            raise ValueError("%s: row %d of a table is not a permutation of 0 .. %d"
+                             % (filename, bad, n - 1))
+
+    return names[:n], names[n:], k_prefs, l_rank
+
+
+"""
+Checks every row of an n * n table of ids, so a bad id fails when the file
+is loaded and not deep inside match(). With NumPy the rows are sorted a
+block at a time, which is about ten times faster than a set per row.
+@return the first row that is not a permutation of 0 .. n - 1, or -1
+"""
+def bad_row(n, table):
+    if np is None:
+        ids = set(range(n))
+        for row in range(n):
+            if set(table[row * n:(row + 1) * n]) != ids:
+                return row
+        return -1
+
+    ids = np.arange(n)
+    rows = np.asarray(table).reshape(n, n)
+    block = max(1, (1 << 20) // max(n, 1))
+    for start in range(0, n, block):
+        ok = (np.sort(rows[start:start + block], axis=1) == ids).all(axis=1)
+        if not ok.all():
+            return start + int(np.argmin(ok))
+    return -1
+
+
+"""
+Writes k_names, l_names, k_prefs, l_rank in the binary format.
+"""
+def write_binary(filename, k_names, l_names, k_prefs, l_rank):
+    n = len(k_names)
+    code = typecode(n).upper()
+    names = "\n".join(k_names + l_names).encode()
+    names += b"\0" * (-len(names) % 8)
+
+    with open(filename, "wb") as output_file:
+        output_file.write(HEADER.pack(MAGIC, n, array(code).itemsize, len(names)))
+        output_file.write(names)
+        for table in (k_prefs, l_rank):
+            table = array(code, table)
+            if sys.byteorder == "big":
+                table.byteswap()
+            table.tofile(output_file)
+
+
+"""
+Converts a text preference file to the binary format.
+"""
+def convert(text_filename, binary_filename):
+    write_binary(binary_filename, *read_text(text_filename))
+
+
+"""
+Reads either format, going by the first bytes of the file.
+@return k_names, l_names, k_prefs, l_rank
+"""
+def load(filename):
+    if is_binary(filename):
+        return read_binary(filename)
+    return read_text(filename)
+
+
+"""
+Turns the id tables back into the knights and ladies dictionaries that
+marriage.initiate() makes from a text file.
+"""
+def to_dicts(k_names, l_names, k_prefs, l_rank):
+    n = len(k_names)
+    knights = {}
+    ladies = {}
+    for k, name in enumerate(k_names):
+        knights[name] = [l_names[lady] for lady in k_prefs[k * n:(k + 1) * n]]
+    for l, name in enumerate(l_names):
+        ranks = l_rank[l * n:(l + 1) * n]
+        ladies[name] = [k_names[knight] for knight in sorted(range(n), key=ranks.__getitem__)]
+    return knights, ladies
+
+
+"""
+Calls func(*args) while tracing Python allocations.
+@return func's result and the peak number of bytes allocated while it ran
+"""
+def peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+if __name__ == "__main__":
+    # python prefio.py input.txt output.bin
+    if len(sys.argv) != 3:
+        exit(1)
+    convert(sys.argv[1], sys.argv[2])
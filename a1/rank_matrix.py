@@ -0,0 +1,105 @@
+import numpy as np
+
+"""
+NumPy backend for marriage.py, for instances where dicts of string lists
+get too big. Both sides are kept as n x n int32 matrices, so an instance
+costs about 8 * n^2 bytes once the ladies' preference matrix is dropped.
+"""
+
+
+"""
+Builds the matrices from the dictionaries made by marriage.initiate().
+Row k of k_prefs is knight k's list as lady ids, and l_rank[l, k] is where
+lady l ranks knight k, made from her list with a single argsort.
+@param  knights, ladies - dictionaries
+@return k_names, l_names, k_prefs, l_rank
+"""
+def build(knights, ladies):
+    n = len(knights)
+    k_names = list(knights)
+    l_names = list(ladies)
+    k_ids = {name: i for i, name in enumerate(k_names)}
+    l_ids = {name: i for i, name in enumerate(l_names)}
+
+    try:
+        k_prefs = np.fromiter((l_ids[lady] for name in k_names for lady in knights[name]),
+                              dtype=np.int32, count=n * n).reshape(n, n)
+        l_prefs = np.fromiter((k_ids[knight] for name in l_names for knight in ladies[name]),
+                              dtype=np.int32, count=n * n).reshape(n, n)
+    except KeyError:
+        exit(1)
+
+    # Each row of l_prefs is a permutation, so sorting it gives its inverse
+    l_rank = np.argsort(l_prefs, axis=1).astype(np.int32)
+    return k_names, l_names, k_prefs, l_rank
+
+
+"""
+Views the flat typed arrays or memoryviews from marriage.index() or
+prefio.load() as n x n matrices, without copying them.
+@return k_prefs, l_rank
+"""
+def wrap(n, k_prefs, l_rank):
+    k_prefs = np.frombuffer(k_prefs, dtype=memoryview(k_prefs).format).reshape(n, n)
+    l_rank = np.frombuffer(l_rank, dtype=memoryview(l_rank).format).reshape(n, n)
+    return k_prefs, l_rank
+
+
+"""
+Gale-Shapley in rounds: every free knight proposes to his next lady at
+once, and each lady keeps the best of her new proposals and her current
+partner. Any order of proposals ends in the same matching, so this gives
+the same answer as marriage.stable().
+@param  k_prefs, l_rank - as built by build()
+@param  trace - an instrument.Trace to fill in, if wanted
+@return an int32 array where entry l is the id of lady l's knight
+"""
+def match(k_prefs, l_rank, trace=None):
+    n = len(k_prefs)
+    nxt = np.zeros(n, dtype=np.int32)
+    l_partner = np.full(n, -1, dtype=np.int32)
+    # Rank of each lady's partner in her own list, n while she is free
+    held = np.full(n, n, dtype=np.int32)
+    free = np.arange(n, dtype=np.int32)
+    if trace is not None:
+        breakups = np.zeros(n, dtype=np.int64)
+
+    while len(free):
+        if trace is not None:
+            trace.queue.append((int(nxt.sum()), len(free)))
+        ladies = k_prefs[free, nxt[free]]
+        nxt[free] += 1
+        ranks = l_rank[ladies, free]
+
+        # Group the proposals by lady, best rank first
+        order = np.lexsort((ranks, ladies))
+        ladies, knights, ranks = ladies[order], free[order], ranks[order]
+        best = np.ones(len(ladies), dtype=bool)
+        best[1:] = ladies[1:] != ladies[:-1]
+
+        # The best proposal only wins if she likes him more than her partner
+        best[best] = ranks[best] < held[ladies[best]]
+        won = ladies[best]
+        dumped = l_partner[won]
+
+        l_partner[won] = knights[best]
+        held[won] = ranks[best]
+        dumped = dumped[dumped >= 0]
+        free = np.concatenate((knights[~best], dumped))
+        if trace is not None:
+            np.add.at(breakups, dumped, 1)
+
+    if trace is not None:
+        trace.finish(nxt.tolist(), breakups.tolist())
+    return l_partner
+
+
+"""
+Same answer as marriage.stable(), using the matrices above.
+@param  knights, ladies - dictionaries
+@return a dict of the knight each lady says yes to
+"""
+def stable_numpy(knights, ladies):
+    k_names, l_names, k_prefs, l_rank = build(knights, ladies)
+    l_partner = match(k_prefs, l_rank)
+    return {lady: k_names[knight] for lady, knight in zip(l_names, l_partner.tolist())}
@@ -0,0 +1,71 @@
+import numpy as np
+import rank_matrix
+
+"""
+Checks that a matching really is stable by finding every blocking pair:
+a knight and a lady who both like each other more than their partners.
+Works on the n x n matrices of rank_matrix.py, a block of knights at a
+time, so only the lists above each knight's partner are ever compared.
+"""
+
+
+"""
+Finds every blocking pair of a matching.
+Raises ValueError if l_partner does not pair everyone off.
+@param  k_prefs, l_rank - n x n matrices, as built by rank_matrix.build()
+@param  l_partner - entry l is the id of lady l's knight, as match() returns
+@param  block - how many knights to check at once
+@return arrays of knight ids and lady ids, one entry per blocking pair
+"""
+def blocking_pairs(k_prefs, l_rank, l_partner, block=1024):
+    n = len(k_prefs)
+    l_partner = np.asarray(l_partner, dtype=np.int64)
+    if l_partner.shape != (n,) or not np.array_equal(np.sort(l_partner), np.arange(n)):
+        raise ValueError("not a matching")
+
+    k_partner = np.empty(n, dtype=np.int64)
+    k_partner[l_partner] = np.arange(n)
+    # How much each lady likes the knight she has
+    held = l_rank[np.arange(n), l_partner]
+
+    knights = []
+    ladies = []
+    for start in range(0, n, block):
+        rows = k_prefs[start:start + block]
+        ids = np.arange(start, start + len(rows))
+        # Where each knight's partner is in his own list
+        cut = np.argmax(rows == k_partner[ids, None], axis=1)
+        above = np.arange(n) < cut[:, None]
+
+        # Every lady a knight likes more than his partner...
+        suitors = np.repeat(ids, cut)
+        wanted = rows[above]
+        # ...who also likes him more than hers
+        blocking = l_rank[wanted, suitors] < held[wanted]
+        knights.append(suitors[blocking])
+        ladies.append(wanted[blocking].astype(np.int64))
+
+    if not knights:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(knights), np.concatenate(ladies)
+
+
+"""
+True if the matching has no blocking pairs.
+"""
+def is_stable(k_prefs, l_rank, l_partner):
+    return len(blocking_pairs(k_prefs, l_rank, l_partner)[0]) == 0
+
+
+"""
+blocking_pairs() for the dictionaries from marriage.initiate().
+@param  knights, ladies - dictionaries
+@param  partners - a dict of the knight each lady says yes to
+@return a list of (knight, lady) name pairs
+"""
+def check(knights, ladies, partners):
+    k_names, l_names, k_prefs, l_rank = rank_matrix.build(knights, ladies)
+    k_ids = {name: i for i, name in enumerate(k_names)}
+    l_partner = [k_ids[partners[lady]] for lady in l_names]
+    pairs = blocking_pairs(k_prefs, l_rank, l_partner)
+    return [(k_names[knight], l_names[lady]) for knight, lady in zip(*(ids.tolist() for ids in pairs))]
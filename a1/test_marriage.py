@@ -0,0 +1,444 @@
+#!/usr/bin/python
+import copy
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+import batch
+import bench
+import generate
+import hospitals
+import instrument
+import json
+import marriage
+import prefio
+
+try:
+    import rank_matrix
+    import stability
+except ImportError:
+    rank_matrix = stability = None
+
+
+def read(filename):
+    return marriage.initiate(filename)
+
+
+def write_temp(text, suffix=".txt"):
+    handle, filename = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(handle, "wb" if isinstance(text, bytes) else "w") as temp:
+        temp.write(text)
+    return filename
+
+
+def random_instance(n, seed):
+    rng = random.Random(seed)
+    k_names = ["K%d" % i for i in range(n)]
+    l_names = ["L%d" % i for i in range(n)]
+    knights = {name: rng.sample(l_names, n) for name in k_names}
+    ladies = {name: rng.sample(k_names, n) for name in l_names}
+    return knights, ladies
+
+
+class TestMarriage(unittest.TestCase):
+    def testTen(self):
+        self.assertSameAsReference(*read("data/ten.txt"))
+
+    def testHundred(self):
+        self.assertSameAsReference(*read("data/hundred.txt"))
+
+    def testRandom(self):
+        for seed in range(20):
+            self.assertSameAsReference(*random_instance(1 + seed, seed))
+
+    def testGenerated(self):
+        for kind in generate.KINDS:
+            filename = write_temp("")
+            try:
+                generate.write(filename, kind, 30, seed=4)
+                self.assertSameAsReference(*read(filename))
+                row = bench.measure(filename, kind, 30, 30)
+            finally:
+                os.remove(filename)
+            self.assertEqual(set(row), set(bench.COLUMNS))
+            if kind == "worst":
+                self.assertEqual(row["proposals"], 30 * 30 - 30 + 1)
+
+    def testLeavesInputAlone(self):
+        knights, ladies = random_instance(10, 1)
+        before = copy.deepcopy(knights)
+        marriage.stable_fast(knights, ladies)
+        self.assertEqual(knights, before)
+
+    def assertSameAsReference(self, knights, ladies):
+        expected = marriage.stable(copy.deepcopy(knights), ladies)
+        ans = marriage.stable_fast(knights, ladies)
+        self.assertEqual(ans, expected)
+        self.assertEqual(list(ans), list(expected))
+        if rank_matrix is not None:
+            self.assertEqual(rank_matrix.stable_numpy(knights, ladies), expected)
+
+    @unittest.skipIf(rank_matrix is None, "needs numpy")
+    def testRankMatrixMemory(self):
+        knights, ladies = random_instance(50, 3)
+        k_names, l_names, k_prefs, l_rank = rank_matrix.build(knights, ladies)
+        self.assertEqual(k_prefs.nbytes + l_rank.nbytes, 8 * 50 * 50)
+
+
+def blocking_pairs(knights, ladies, partners):
+    """The slow, obvious check: every knight against every lady."""
+    k_partner = {knight: lady for lady, knight in partners.items()}
+    pairs = []
+    for knight, prefs in knights.items():
+        for lady in prefs[:prefs.index(k_partner[knight])]:
+            l_pref = ladies[lady]
+            if l_pref.index(knight) < l_pref.index(partners[lady]):
+                pairs.append((knight, lady))
+    return pairs
+
+
+class TestRematch(unittest.TestCase):
+    def change(self, knights, ladies, seed, n_knights, n_ladies):
+        rng = random.Random(seed)
+        changed_knights = rng.sample(sorted(knights), n_knights)
+        changed_ladies = rng.sample(sorted(ladies), n_ladies)
+        for name in changed_knights:
+            rng.shuffle(knights[name])
+        for name in changed_ladies:
+            rng.shuffle(ladies[name])
+        return changed_knights, changed_ladies
+
+    def testRandomChanges(self):
+        for seed in range(10):
+            n = 150
+            knights, ladies = random_instance(n, seed)
+            k_names, l_names, k_prefs, l_rank = marriage.index(knights, ladies)
+            state = marriage.match_state(n, k_prefs, l_rank)
+            l_partner = state[0]
+
+            # Change the lists twice, carrying on from the last repair each time
+            for step in range(2):
+                changed_knights, changed_ladies = self.change(knights, ladies, seed * 2 + step, 2, 2)
+                k_names, l_names, k_prefs, l_rank = marriage.index(knights, ladies)
+                marriage.rematch(n, k_prefs, l_rank, *state,
+                                 changed_knights=[k_names.index(name) for name in changed_knights],
+                                 changed_ladies=[l_names.index(name) for name in changed_ladies])
+                self.assertEqual(sorted(l_partner), list(range(n)))
+                self.assertEqual([state[1][knight] for knight in l_partner], list(range(n)))
+
+                partners = {lady: k_names[knight] for lady, knight in zip(l_names, l_partner)}
+                self.assertEqual(blocking_pairs(knights, ladies, partners), [])
+                # A full recompute is stable too, and everyone has someone either way
+                expected = marriage.stable_fast(knights, ladies)
+                self.assertEqual(blocking_pairs(knights, ladies, expected), [])
+                self.assertEqual(sorted(partners.values()), sorted(expected.values()))
+
+    def testLessWorkThanMatch(self):
+        # All of rematch()'s work, repairs included, against a full match's proposals
+        n = 1000
+        for n_knights, n_ladies in ((1, 0), (0, 1), (2, 2)):
+            knights, ladies = random_instance(n, n_knights * 2 + n_ladies)
+            k_names, l_names, k_prefs, l_rank = marriage.index(knights, ladies)
+            state = marriage.match_state(n, k_prefs, l_rank)
+            changed_knights, changed_ladies = self.change(knights, ladies, n, n_knights, n_ladies)
+            k_names, l_names, k_prefs, l_rank = marriage.index(knights, ladies)
+            full = marriage.propose(n, k_prefs, l_rank, [-1] * n, marriage.deque(range(n)), [0] * n)
+            work = marriage.rematch(n, k_prefs, l_rank, *state,
+                                    changed_knights=[k_names.index(name) for name in changed_knights],
+                                    changed_ladies=[l_names.index(name) for name in changed_ladies])
+            self.assertLess(work, full)
+
+    def testNoChanges(self):
+        knights, ladies = read("data/hundred.txt")
+        partners = marriage.stable_fast(knights, ladies)
+        self.assertEqual(marriage.restable(knights, ladies, partners), partners)
+
+    def testByName(self):
+        knights, ladies = read("data/ten.txt")
+        partners = marriage.stable_fast(knights, ladies)
+        knights["Benjamin"].reverse()
+        ladies["Katie"].reverse()
+        ans = marriage.restable(knights, ladies, partners, ["Benjamin"], ["Katie"])
+        self.assertEqual(blocking_pairs(knights, ladies, ans), [])
+
+
+@unittest.skipIf(stability is None, "needs numpy")
+class TestStability(unittest.TestCase):
+    def testStable(self):
+        knights, ladies = read("data/hundred.txt")
+        self.assertEqual(stability.check(knights, ladies, marriage.stable_fast(knights, ladies)), [])
+
+    def testSameAsSlowCheck(self):
+        for seed in range(10):
+            knights, ladies = random_instance(40, seed)
+            partners = marriage.stable_fast(knights, ladies)
+            # Pair the ladies up with some other knights
+            names = list(partners.values())
+            random.Random(seed).shuffle(names)
+            partners = dict(zip(partners, names))
+            self.assertEqual(sorted(stability.check(knights, ladies, partners)),
+                             sorted(blocking_pairs(knights, ladies, partners)))
+
+    def testNotAMatching(self):
+        k_prefs, l_rank = rank_matrix.wrap(2, *marriage.index(*random_instance(2, 0))[2:])
+        with self.assertRaises(ValueError):
+            stability.blocking_pairs(k_prefs, l_rank, [0, 0])
+
+
+class TestInstrument(unittest.TestCase):
+    def testTrace(self):
+        knights, ladies = read("data/hundred.txt")
+        k_names, l_names, k_prefs, l_rank = marriage.index(knights, ladies)
+        n = len(k_names)
+        engines = [lambda trace: marriage.match(n, k_prefs, l_rank, trace)]
+        if rank_matrix is not None:
+            matrices = rank_matrix.wrap(n, k_prefs, l_rank)
+            engines.append(lambda trace: rank_matrix.match(*matrices, trace=trace).tolist())
+
+        expected = marriage.match(n, k_prefs, l_rank)
+        for engine in engines:
+            trace = instrument.Trace()
+            with trace.phase("match"):
+                self.assertEqual(engine(trace), expected)
+            self.assertIn("match", trace.phases)
+            self.assertEqual(trace.queue[0], (0, n))
+            for proposals, rejections, breakups in zip(trace.proposals, trace.rejections, trace.breakups):
+                self.assertEqual(proposals, rejections + breakups + 1)
+
+            result = json.loads(trace.to_json(k_names))
+            self.assertEqual(result["total_proposals"], sum(trace.proposals))
+            self.assertEqual(set(result["proposals"]), set(k_names))
+
+        # Proposals end just past each knight's partner, however they were made
+        self.assertEqual(sum(trace.proposals), sum(knights[expected_knight].index(lady) + 1
+                                                   for lady, expected_knight in
+                                                   marriage.stable_fast(knights, ladies).items()))
+
+
+class TestHospitals(unittest.TestCase):
+    def testCapacityOneIsMarriage(self):
+        knights, ladies = read("data/hundred.txt")
+        lines = ["%d %d\n" % (len(knights), len(ladies))]
+        lines += ["%s %s\n" % (name, " ".join(prefs)) for name, prefs in knights.items()]
+        lines += ["%s 1 %s\n" % (name, " ".join(prefs)) for name, prefs in ladies.items()]
+        filename = write_temp("".join(lines))
+        try:
+            r_names, h_names, r_prefs, r_start, r_rank, capacity = hospitals.read(filename)
+        finally:
+            os.remove(filename)
+        r_partner = hospitals.match(r_prefs, r_start, r_rank, capacity)
+        ans = {h_names[hosp]: r_names[res] for res, hosp in enumerate(r_partner)}
+        self.assertEqual(ans, marriage.stable_fast(knights, ladies))
+
+    def testRandom(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            r_names = ["R%d" % i for i in range(200)]
+            h_names = ["H%d" % i for i in range(12)]
+            r_lists = {name: rng.sample(h_names, rng.randint(1, 6)) for name in r_names}
+            h_lists = {name: rng.sample(r_names, rng.randint(0, 150)) for name in h_names}
+            caps = {name: rng.randint(0, 15) for name in h_names}
+            lines = ["%d %d\n" % (len(r_names), len(h_names))]
+            lines += ["%s %s\n" % (name, " ".join(r_lists[name])) for name in r_names]
+            lines += [" ".join([name, str(caps[name])] + h_lists[name]) + "\n" for name in h_names]
+            filename = write_temp("".join(lines))
+            try:
+                instance = hospitals.read(filename)
+            finally:
+                os.remove(filename)
+            r_partner = hospitals.match(*instance[2:])
+            got = {r_names[res]: h_names[hosp] for res, hosp in enumerate(r_partner) if hosp != -1}
+            self.assertStable(r_lists, h_lists, caps, got)
+
+    def testBadFiles(self):
+        for text in ("1\nA a\na 1 A\n", "1 1\nA a\n", "1 1\nA b\na 1 A\n",
+                     "1 1\nA a\na x A\n", "1 1\nA a a\na 1 A\n", "1 1\nA a\na 1 A A\n",
+                     "2 1\nA a\nB a\na 1 A B A\n"):
+            filename = write_temp(text)
+            try:
+                with self.assertRaises(SystemExit):
+                    hospitals.read(filename)
+            finally:
+                os.remove(filename)
+
+    def assertStable(self, r_lists, h_lists, caps, got):
+        members = {name: [res for res in h_lists[name] if got.get(res) == name] for name in h_lists}
+        for name, residents in members.items():
+            self.assertLessEqual(len(residents), caps[name])
+        for res, hosp in got.items():
+            self.assertIn(hosp, r_lists[res])
+            self.assertIn(res, h_lists[hosp])
+        for res, prefs in r_lists.items():
+            better = prefs[:prefs.index(got[res])] if res in got else prefs
+            for hosp in better:
+                if res not in h_lists[hosp]:
+                    continue
+                ranks = [h_lists[hosp].index(other) for other in members[hosp]]
+                # hosp would rather have res than a free place or someone it has
+                self.assertFalse(len(ranks) < caps[hosp] or (ranks and h_lists[hosp].index(res) < max(ranks)),
+                                 (res, hosp))
+
+
+class TestPrefIO(unittest.TestCase):
+    def testSameAsIndex(self):
+        for filename in ("data/ten.txt", "data/hundred.txt"):
+            expected = marriage.index(*marriage.initiate(filename))
+            ans = prefio.read_text(filename)
+            self.assertEqual(ans[:2], expected[:2])
+            self.assertEqual(list(ans[2]), list(expected[2]))
+            self.assertEqual(list(ans[3]), list(expected[3]))
+
+    def testBadFiles(self):
+        for text in ("", "two\nA a\nB b\n", "1\nA a\n", "1\nA a\na A\n\n",
+                     "2\nA a b\nB a b\na A B\nb A\n", "1\nA x\na A\n",
+                     "2\nA a b\nA a b\na A A\nb A A\n"):
+            filename = write_temp(text)
+            try:
+                with self.assertRaises(SystemExit):
+                    prefio.read_text(filename)
+            finally:
+                os.remove(filename)
+        with self.assertRaises(SystemExit):
+            prefio.read_text("data/missing.txt")
+
+    def testNoTrailingNewline(self):
+        filename = write_temp("1\nA a\na A")
+        try:
+            self.assertEqual(prefio.read_text(filename)[:2], (["A"], ["a"]))
+        finally:
+            os.remove(filename)
+
+    def testBinary(self):
+        filename = write_temp(b"", ".bin")
+        try:
+            prefio.convert("data/hundred.txt", filename)
+            self.assertTrue(prefio.is_binary(filename))
+            self.assertFalse(prefio.is_binary("data/hundred.txt"))
+            expected = prefio.read_text("data/hundred.txt")
+            ans = prefio.load(filename)
+            self.assertEqual(ans[:2], expected[:2])
+            self.assertEqual(list(ans[2]), list(expected[2]))
+            self.assertEqual(list(ans[3]), list(expected[3]))
+            self.assertEqual(marriage.initiate(filename), marriage.initiate("data/hundred.txt"))
+            del ans
+
+            # A cut off file is rejected
+            with open(filename, "rb") as binary:
+                data = binary.read()
+            with open(filename, "wb") as binary:
+                binary.write(data[:-1])
+            with self.assertRaises(SystemExit):
+                prefio.load(filename)
+        finally:
+            os.remove(filename)
+
+    def testBinaryBadIds(self):
+        # An id past n, then a row with an id twice, in each table
+        for table, offset, value in ((0, 3, 10), (0, 3, 0), (1, 0, 65535), (1, 95, 1)):
+            filename = write_temp(b"", ".bin")
+            try:
+                prefio.convert("data/ten.txt", filename)
+                instance = prefio.load(filename)
+                n = len(instance[0])
+                start = os.path.getsize(filename) - 2 * n * n * 2
+                del instance
+                with open(filename, "r+b") as binary:
+                    binary.seek(start + (table * n * n + offset) * 2)
+                    binary.write(value.to_bytes(2, "little"))
+                for np in (prefio.np, None):
+                    saved, prefio.np = prefio.np, np
+                    try:
+                        with self.assertRaisesRegex(ValueError, "row %d" % (offset // n)):
+                            prefio.load(filename)
+                    finally:
+                        prefio.np = saved
+            finally:
+                os.remove(filename)
+
+    def testPeakMemory(self):
+        n = 300
+        knights, ladies = random_instance(n, 7)
+        lines = ["%d\n" % n]
+        lines += ["%s %s\n" % (name, " ".join(prefs)) for name, prefs in knights.items()]
+        lines += ["%s %s\n" % (name, " ".join(prefs)) for name, prefs in ladies.items()]
+        filename = write_temp("".join(lines))
+        try:
+            instance, peak = prefio.peak_memory(prefio.read_text, filename)
+            size = os.path.getsize(filename)
+        finally:
+            os.remove(filename)
+        # The two id arrays, plus room for a line at a time and the names;
+        # reading the whole file as strings would take several times this
+        arrays = len(instance[2]) * instance[2].itemsize + len(instance[3]) * instance[3].itemsize
+        self.assertLess(peak, arrays + 150000)
+        self.assertLess(peak, size)
+
+
+class TestBatch(unittest.TestCase):
+    def testSameAsMain(self):
+        manifest = write_temp("# both data files\n%s\n\n%s\nmissing.txt\n" %
+                              (os.path.abspath("data/ten.txt"), os.path.abspath("data/hundred.txt")))
+        try:
+            files = batch.instances(manifest)
+        finally:
+            os.remove(manifest)
+        self.assertEqual(len(files), 3)
+
+        out = io.StringIO()
+        self.assertEqual(batch.run_all(files, workers=2, out=out), 1)
+        chunks = out.getvalue().split("# ")[1:]
+        for filename, chunk in zip(files[:2], chunks):
+            header, output = chunk.split("\n", 1)
+            self.assertEqual(header.split()[0], filename)
+            self.assertEqual(output, marriage.solve(filename))
+        self.assertEqual(chunks[2], files[2] + " failed\n")
+
+    def testCorruptFile(self):
+        # A binary file whose name table is not UTF-8, which raises
+        # UnicodeDecodeError rather than exiting
+        corrupt = write_temp(b"", ".bin")
+        prefio.convert("data/ten.txt", corrupt)
+        with open(corrupt, "r+b") as binary:
+            binary.seek(prefio.HEADER.size)
+            binary.write(b"\xff")
+        files = [os.path.abspath("data/ten.txt"), corrupt, os.path.abspath("data/hundred.txt")]
+        try:
+            out = io.StringIO()
+            self.assertEqual(batch.run_all(files, workers=2, out=out), 1)
+        finally:
+            os.remove(corrupt)
+        chunks = out.getvalue().split("# ")[1:]
+        self.assertEqual(chunks[1], corrupt + " failed\n")
+        for filename, chunk in ((files[0], chunks[0]), (files[2], chunks[2])):
+            header, output = chunk.split("\n", 1)
+            self.assertEqual(header.split()[0], filename)
+            self.assertEqual(output, marriage.solve(filename))
+
+    def testNoStats(self):
+        for option in ("--stats", "--stats=out.json"):
+            argv, stderr = sys.argv, sys.stderr
+            sys.argv, sys.stderr = ["batch.py", option, "data"], io.StringIO()
+            try:
+                with self.assertRaises(SystemExit):
+                    batch.main()
+                self.assertIn("--stats", sys.stderr.getvalue())
+            finally:
+                sys.argv, sys.stderr = argv, stderr
+
+class TestCommandLine(unittest.TestCase):
+    def testBadOptions(self):
+        for option in ("--stats", "--stats=", "--numpy=1", "--verify=x", "--fast"):
+            argv, stderr = sys.argv, sys.stderr
+            sys.argv, sys.stderr = ["marriage.py", option, "data/ten.txt"], io.StringIO()
+            try:
+                with self.assertRaises(SystemExit) as caught:
+                    marriage.main()
+                self.assertEqual(caught.exception.code, 1)
+                self.assertEqual(sys.stderr.getvalue(), marriage.USAGE)
+            finally:
+                sys.argv, sys.stderr = argv, stderr
+
+if __name__ == '__main__':
+    unittest.main(argv = sys.argv + ['--verbose'])
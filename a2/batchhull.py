@@ -0,0 +1,199 @@
+import sys
+import numpy as np
+from convexhull import ERRBOUND, orientation
+
+'''
+Convex hulls of many small point sets at once.
+The point sets come in one flat (N, 2) float64 array of coordinates
+and an array of G + 1 offsets, CSR style:
+group g is coords[offsets[g]:offsets[g + 1]].
+The hulls come back in the same form, each in computeHull's order.
+
+Calling computeHull once per group spends most of its time on the call
+itself (the set, the sort, clockwiseOrder) when groups are small,
+so here the prefilter, the sort and the rotation into clockwise order
+are done for every group together with NumPy,
+and the monotone chain is one flat loop over whatever points survive.
+'''
+
+
+'''
+Given the offsets, checks them against the N points
+and returns the group of every point.
+'''
+def groupIds(offsets, n):
+    if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != n or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must rise from 0 to the number of points")
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+'''
+Given a mask over the points, the start of every non-empty group,
+and which of those groups each point is in (numbered among the non-empty ones),
+returns the index of the first point of each group where mask is True.
+'''
+def firstWhere(mask, starts):
+    candidates = np.where(mask, np.arange(len(mask)), len(mask))
+    return np.minimum.reduceat(candidates, starts)
+
+
+'''
+Given the points and their groups as for firstWhere,
+returns the Akl-Toussaint octagon of every group at once:
+an (8, M, 2) array of the corners extremes() would find,
+counter-clockwise, but with repeats left in.
+'''
+def groupCorners(coords, starts, group):
+    x = coords[:, 0]
+    y = coords[:, 1]
+    corners = []
+    for key, reduce in ((x, np.minimum), (x + y, np.minimum), (y, np.minimum), (x - y, np.maximum),
+                        (x, np.maximum), (x + y, np.maximum), (y, np.maximum), (x - y, np.minimum)):
+        best = reduce.reduceat(key, starts)
+        corners.append(coords[firstWhere(key == best[group], starts)])
+    return np.array(corners)
+
+
+'''
+Given the points and their groups as for firstWhere,
+returns a mask of the points that are not strictly inside their group's octagon,
+the only ones that can be on a hull.
+'''
+def prefilter(coords, starts, group):
+    corners = groupCorners(coords, starts, group)
+    counts = np.diff(np.append(starts, len(coords)))
+    x = coords[:, 0]
+    y = coords[:, 1]
+    inside = np.ones(len(coords), dtype=bool)
+    edges = np.zeros(len(starts), dtype=int)
+    for k in range(8):
+        a = corners[k]
+        b = corners[(k + 1) % 8]
+        # A repeated corner makes an edge of no length, which is no test at all
+        repeat = np.all(a == b, axis=1)
+        edges += ~repeat
+        ax = np.repeat(a[:, 0], counts)
+        ay = np.repeat(a[:, 1], counts)
+        left = np.repeat(b[:, 0] - a[:, 0], counts) * (y - ay)
+        right = np.repeat(b[:, 1] - a[:, 1], counts) * (x - ax)
+        inside &= np.repeat(repeat, counts) | (left - right > ERRBOUND * (np.abs(left) + np.abs(right)))
+    # Fewer than three distinct corners enclose nothing
+    inside &= np.repeat(edges >= 3, counts)
+    return ~inside
+
+
+'''
+Given the x and y coordinates of points sorted by group, then x, then y,
+without repeats, and bounds such that group g is the points
+from bounds[g] up to bounds[g + 1],
+runs the monotone chain over every group in one flat loop.
+Returns the indices of the hull points, each hull as baseHull would have it,
+one hull after another, and the offsets of the hulls in that list.
+The orientation test is written out (with the same error bound as
+orientation, which it falls back on only when the sign is in doubt)
+because a function call per test is most of the cost of the loop.
+'''
+def chains(xs, ys, bounds):
+    hull = []
+    offsets = [0]
+    for g in range(len(bounds) - 1):
+        lo = bounds[g]
+        hi = bounds[g + 1]
+        if hi - lo <= 2:
+            hull.extend(range(lo, hi))
+            offsets.append(len(hull))
+            continue
+        # Lower chain left to right, then upper chain back again,
+        # never popping what the earlier part already settled
+        floor = len(hull) + 2
+        for visit in (range(lo, hi), range(hi - 2, lo - 1, -1)):
+            for i in visit:
+                x = xs[i]
+                y = ys[i]
+                while len(hull) >= floor:
+                    a = hull[-2]
+                    b = hull[-1]
+                    left = (xs[b] - xs[a]) * (y - ys[a])
+                    right = (ys[b] - ys[a]) * (x - xs[a])
+                    det = left - right
+                    bound = ERRBOUND * (abs(left) + abs(right))
+                    if det > bound:
+                        break
+                    if det >= -bound and orientation((xs[a], ys[a]), (xs[b], ys[b]), (x, y)) > 0:
+                        break
+                    hull.pop()
+                hull.append(i)
+            floor = len(hull) + 1
+        # The last point is the first one again
+        hull.pop()
+        offsets.append(len(hull))
+    return hull, offsets
+
+
+'''
+Given hulls and offsets as chains() returns them (as arrays),
+rotates every hull to start where clockwiseOrder would start it.
+'''
+def rotate(hull, offsets):
+    sizes = np.diff(offsets)
+    if len(hull) == 0:
+        return hull
+    nonempty = sizes > 0
+    starts = offsets[:-1][nonempty]
+    counts = sizes[nonempty]
+    group = np.repeat(np.arange(len(starts)), counts)
+    centre = np.add.reduceat(hull, starts) / counts[:, None]
+    delta = hull - centre[group]
+    angle = (np.arctan2(delta[:, 1], delta[:, 0]) + 2 * np.pi) % (2 * np.pi)
+    smallest = np.minimum.reduceat(angle, starts)
+    first = firstWhere(angle == smallest[group], starts)
+    # Point j of a hull is taken from (j + shift) mod its size
+    position = np.arange(len(hull)) - starts[group]
+    shift = first - starts
+    return hull[starts[group] + (position + shift[group]) % counts[group]]
+
+
+'''
+Given a flat (N, 2) array of coordinates (or anything np.asarray can make one of)
+and G + 1 offsets splitting it into groups,
+returns (hullCoords, hullOffsets): the hull of every group, in the same form,
+each in the order computeHull would give it.
+Empty groups have empty hulls.
+'''
+def batchHull(coords, offsets):
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    group = groupIds(offsets, len(coords))
+    sizes = np.diff(offsets)
+    if len(coords):
+        nonempty = sizes > 0
+        local = np.repeat(np.arange(np.count_nonzero(nonempty)), sizes[nonempty])
+        keep = prefilter(coords, offsets[:-1][nonempty], local)
+        coords = coords[keep]
+        group = group[keep]
+    order = np.lexsort((coords[:, 1], coords[:, 0], group))
+    coords = coords[order]
+    group = group[order]
+    # Drop repeats within a group, which are next to each other once sorted
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = np.any(coords[1:] != coords[:-1], axis=1) | (group[1:] != group[:-1])
+    coords = coords[keep]
+    bounds = np.searchsorted(group[keep], np.arange(len(offsets)))
+    hull, hullOffsets = chains(coords[:, 0].tolist(), coords[:, 1].tolist(), bounds.tolist())
+    hull = coords[np.array(hull, dtype=np.int64)]
+    hullOffsets = np.array(hullOffsets, dtype=np.int64)
+    return rotate(hull, hullOffsets), hullOffsets
+
+
+if __name__ == "__main__":
+    # python batchhull.py groups.txt, one group per line as x y x y ...,
+    # prints the hulls the same way
+    coords = []
+    offsets = [0]
+    with open(sys.argv[1]) as input_file:
+        for line in input_file:
+            coords.extend(float(value) for value in line.split())
+            offsets.append(len(coords) // 2)
+    hull, hullOffsets = batchHull(coords, offsets)
+    for lo, hi in zip(hullOffsets[:-1], hullOffsets[1:]):
+        sys.stdout.write(" ".join("%r %r" % (x, y) for x, y in hull[lo:hi].tolist()) + "\n")
@@ -0,0 +1,222 @@
+import math
+import random
+import sys
+import time
+from fractions import Fraction
+import convexhull
+
+'''
+Checks computeHull against a separate, exact monotone chain
+and times it on generated points, writing a table.
+
+    python benchhull.py [--sizes=1000,10000,100000,1000000]
+                        [--kinds=uniform,circle,gaussian,degenerate]
+                        [--reference-max=100000] [--fuzz=ROUNDS]
+                        [--seed=0] [--output=FILE]
+
+For each kind and size it times computeHull with the python backend
+and, when numpy is there, the numpy one, and checks both against
+referenceHull() up to --reference-max points (past that the reference
+is the slow part; skipped cells are written as "-").
+Sizes can go up to 1e7 (--sizes=1e7), given the memory for it.
+--fuzz=ROUNDS first runs that many rounds of small inputs of every kind,
+sized around BASE_SIZE so merge() does a lot of the work.
+Each row gives the hull size and seconds per column, and is flushed as
+soon as it is measured, since the largest sizes take minutes each.
+'''
+
+KINDS = ("uniform", "circle", "gaussian", "degenerate")
+
+COLUMNS = ("kind", "n", "hull", "python", "numpy", "reference")
+
+
+'''
+Returns n points of the given kind as a list of (x, y) tuples.
+uniform     integers spread evenly over a square
+circle      floats on a circle, so nearly every point is on the hull
+            and most turns are nearly straight
+gaussian    floats from a normal distribution, a few far-out corners
+degenerate  integers on a few vertical lines, a diagonal and a horizontal,
+            with repeats: shared x values, collinear corners, and points
+            on the vertical line merge() splits at
+'''
+def generate(kind, n, seed=0):
+    rng = random.Random(seed)
+    if kind == "uniform":
+        return [(rng.randint(0, 10 ** 6), rng.randint(0, 10 ** 6)) for _ in range(n)]
+    if kind == "circle":
+        points = []
+        for _ in range(n):
+            angle = rng.uniform(0, 2 * math.pi)
+            points.append((10 ** 6 * math.cos(angle), 10 ** 6 * math.sin(angle)))
+        return points
+    if kind == "gaussian":
+        return [(rng.gauss(0, 1), rng.gauss(0, 1)) for _ in range(n)]
+    if kind == "degenerate":
+        size = max(n // 10, 1)
+        points = []
+        for _ in range(n):
+            line = rng.randint(0, 5)
+            t = rng.randint(0, size)
+            if line < 4:
+                points.append((line * size // 3, t))
+            elif line == 4:
+                points.append((t, t))
+            else:
+                points.append((t, 0))
+        return points
+    raise ValueError("unknown kind: %r" % (kind,))
+
+
+'''
+Given floats or integers, returns a dict from each point to the same point
+in integers, scaled by a power of two so nothing is rounded.
+'''
+def exactPoints(points):
+    scale = 1
+    for p in points:
+        for c in p:
+            scale = max(scale, Fraction(c).denominator)
+    return {p: (int(Fraction(p[0]) * scale), int(Fraction(p[1]) * scale)) for p in points}
+
+
+'''
+The monotone chain again, written separately from convexhull
+and on exact integers, to check computeHull against.
+Returns the hull counter-clockwise (y up) from the lowest of the leftmost points.
+'''
+def referenceHull(points):
+    exact = exactPoints(set(points))
+    points = sorted(exact, key=exact.get)
+    if len(points) <= 2:
+        return points
+
+    def cross(o, a, b):
+        o, a, b = exact[o], exact[a], exact[b]
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    hull = []
+    for sequence in (points, points[::-1]):
+        start = len(hull)
+        for p in sequence:
+            while len(hull) >= start + 2 and cross(hull[-2], hull[-1], p) <= 0:
+                hull.pop()
+            hull.append(p)
+        hull.pop()
+    return hull
+
+
+'''
+Returns True if the two hulls are the same corners
+in the same cyclic order, wherever each starts.
+'''
+def sameHull(hull, reference):
+    if len(hull) != len(reference):
+        return False
+    if not hull:
+        return True
+    try:
+        start = reference.index(tuple(hull[0]))
+    except ValueError:
+        return False
+    return [tuple(p) for p in hull] == reference[start:] + reference[:start]
+
+
+'''
+Benchmarks one generated input.
+Returns a dict with an entry for each of COLUMNS.
+'''
+def measure(kind, n, referenceMax, seed=0):
+    row = dict.fromkeys(COLUMNS, "-")
+    row["kind"], row["n"] = kind, n
+    points = generate(kind, n, seed)
+
+    start = time.perf_counter()
+    hull = convexhull.computeHull(points)
+    row["python"] = time.perf_counter() - start
+    row["hull"] = len(hull)
+    if n <= referenceMax:
+        start = time.perf_counter()
+        reference = referenceHull(points)
+        row["reference"] = time.perf_counter() - start
+        if not sameHull(hull, reference):
+            raise AssertionError("computeHull is wrong on %s n=%d seed=%d" % (kind, n, seed))
+    if convexhull.np is not None:
+        array = convexhull.np.array(points, dtype=convexhull.np.float64)
+        del points
+        start = time.perf_counter()
+        fast = convexhull.computeHull(array, "numpy")
+        row["numpy"] = time.perf_counter() - start
+        # Integers come back as floats from the numpy backend, equal all the same
+        if fast != hull:
+            raise AssertionError("the numpy backend disagrees on %s n=%d seed=%d" % (kind, n, seed))
+    return row
+
+
+'''
+Checks computeHull against referenceHull on rounds of small inputs
+of every kind, seeds counting up from seed.
+Raises AssertionError, naming the kind, size and seed, on the first wrong hull.
+'''
+def fuzz(rounds, seed=0):
+    rng = random.Random(seed)
+    for i in range(rounds):
+        for kind in KINDS:
+            n = rng.choice([rng.randint(1, 10), rng.randint(convexhull.BASE_SIZE - 2, 3 * convexhull.BASE_SIZE),
+                            rng.randint(200, 2000)])
+            points = generate(kind, n, seed + i)
+            if not sameHull(convexhull.computeHull(points), referenceHull(points)):
+                raise AssertionError("computeHull is wrong on %s n=%d seed=%d" % (kind, n, seed + i))
+
+
+def run(sizes, kinds, referenceMax, out, seed=0):
+    out.write("\t".join(COLUMNS) + "\n")
+    for kind in kinds:
+        for n in sizes:
+            row = measure(kind, n, referenceMax, seed)
+            cells = []
+            for column in COLUMNS:
+                value = row[column]
+                cells.append("%.6f" % value if column in ("python", "numpy", "reference") and value != "-"
+                             else str(value))
+            out.write("\t".join(cells) + "\n")
+            out.flush()
+
+
+def main():
+    sizes = [1000, 10000, 100000, 1000000]
+    kinds = list(KINDS)
+    referenceMax = 100000
+    rounds = 0
+    seed = 0
+    output = None
+    try:
+        for arg in sys.argv[1:]:
+            option, _, value = arg.partition("=")
+            if option == "--sizes":
+                sizes = [int(float(size)) for size in value.split(",")]
+            elif option == "--kinds" and all(kind in KINDS for kind in value.split(",")):
+                kinds = value.split(",")
+            elif option == "--reference-max":
+                referenceMax = int(float(value))
+            elif option == "--fuzz":
+                rounds = int(value)
+            elif option == "--seed":
+                seed = int(value)
+            elif option == "--output":
+                output = value
+            else:
+                exit(1)
+    except ValueError:
+        exit(1)
+
+    if rounds:
+        fuzz(rounds, seed)
+    if output is None:
+        run(sizes, kinds, referenceMax, sys.stdout, seed)
+    else:
+        with open(output, "w") as out:
+            run(sizes, kinds, referenceMax, out, seed)
+
+if __name__ == "__main__":
+    main()
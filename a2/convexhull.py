@@ -1,8 +1,22 @@
 import math
 import sys
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 EPSILON = sys.float_info.epsilon
 
+# Largest relative rounding error of the floating-point orientation test
+# (Shewchuk's ccwerrboundA, with his epsilon being half of ours)
+ERRBOUND = (3.0 + 8.0 * EPSILON) * EPSILON / 2.0
+
+# Below this many points computeHull stops dividing and uses baseHull,
+# which is linear on sorted points and cheaper than merging tiny hulls
+BASE_SIZE = 64
+
 '''
 Given two points, p1 and p2,
 an x coordinate, x,
@@ -37,34 +51,71 @@ def triangleArea(a, b, c):
             - a[0] * c[1] + b[0] * c[1] - c[0] * b[1]) / 2.0;
 
 
+'''
+Given three points a,b,c,
+returns twice the signed area of the triangle a,b,c,
+or at least a number with the same sign:
+negative if a,b,c is clockwise, positive if counter-clockwise,
+and zero only if they are exactly collinear.
+Integer coordinates are exact to begin with.
+For floats the quick floating-point answer is used
+when it is bigger than the most rounding could have changed it
+(Shewchuk's bound for this formula);
+only when it is not is the area recomputed exactly with Fractions,
+so nearly collinear points still get the right answer.
+'''
+def orientation(a, b, c):
+    left = (b[0] - a[0]) * (c[1] - a[1])
+    right = (b[1] - a[1]) * (c[0] - a[0])
+    det = left - right
+    if type(det) is int or abs(det) > ERRBOUND * (abs(left) + abs(right)):
+        return det
+    return exactOrientation(a, b, c)
+
+
+'''
+orientation worked out with exact rational arithmetic.
+Whole-number floats, common in exactly collinear input, are done as integers,
+which is the same answer several times quicker than Fractions.
+'''
+def exactOrientation(a, b, c):
+    coords = (a[0], a[1], b[0], b[1], c[0], c[1])
+    if all(x == int(x) for x in coords):
+        ax, ay, bx, by, cx, cy = [int(x) for x in coords]
+        return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    ax, ay = Fraction(a[0]), Fraction(a[1])
+    return ((Fraction(b[0]) - ax) * (Fraction(c[1]) - ay)
+            - (Fraction(b[1]) - ay) * (Fraction(c[0]) - ax))
+
+
 '''
 Given three points a,b,c,
 returns True if and only if 
 a,b,c represents a clockwise sequence
-(subject to floating-point precision)
+(exactly, see orientation)
 '''
 def cw(a, b, c):
-    return triangleArea(a, b, c) < -EPSILON;
+    return orientation(a, b, c) < 0
 
 
 '''
 Given three points a,b,c,
 returns True if and only if 
 a,b,c represents a counter-clockwise sequence
-(subject to floating-point precision)
+(exactly, see orientation)
 '''
 def ccw(a, b, c):
-    return triangleArea(a, b, c) > EPSILON;
+    return orientation(a, b, c) > 0
 
 
 '''
 Given three points a,b,c,
 returns True if and only if 
 a,b,c are collinear
-(subject to floating-point precision)
+(exactly, see orientation)
 '''
 def collinear(a, b, c):
-    return abs(triangleArea(a, b, c)) <= EPSILON
+    return orientation(a, b, c) == 0
 
 
 '''
@@ -82,158 +133,435 @@ def clockwiseSort(points):
 
 
 '''
-Replace the implementation of computeHull with a correct computation of the convex hull
-using the divide-and-conquer algorithm
-points is a list of (x,y) values.
-So when we return points this will make it draw from point to point in the list
-and connect tht least one with the first one
-points = [(0,1)] x[0], x[1]
+Given a list of points sorted by x (then y),
+computes their hull with the monotone chain algorithm.
+This is the base case for small inputs.
+Hulls here are lists in counter-clockwise order (y up)
+starting at the lowest of the leftmost points,
+with no three consecutive points collinear.
 '''
-def computeHull(points):
-    clockwiseSort(points)
+def baseHull(points):
+    if len(points) <= 2:
+        return list(points)
 
-    # Base case because 3 points is a hull
-    if len(points) <= 3:
-        return points
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and orientation(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
 
-    # Finds the lowest and highest points to get the mid point with
-    highest = max(points, key=lambda point: point[0])
-    lowest = min(points, key=lambda point: point[0])
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and orientation(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
 
-    midpoint = (highest[0] + lowest[0]) / 2
+    return lower[:-1] + upper[:-1]
 
-    left_half = []
-    right_half = []
 
-    # Splits the points into left and right based off of the mid point
-    for i in points:
-        if i[0] < midpoint:
-            left_half.append(i)
-        else:
-            right_half.append(i)
+'''
+Given a hull and two indices into it,
+returns the points from start to end, counter-clockwise.
+'''
+def walk(hull, start, end):
+    if start <= end:
+        return hull[start:end + 1]
+    return hull[start:] + hull[:end + 1]
 
-    # Recursively calls computeHull
-    left_copy = computeHull(left_half)
-    right_copy = computeHull(right_half)
 
-    # Calls our merge function
-    points = merge(left_copy, right_copy, midpoint)
+'''
+Given the hull as computed here,
+rotates it to start where clockwiseSort would start it,
+so the output matches what sorting the hull by angle gives.
+(Counter-clockwise with y up is clockwise on the screen, where y goes down.)
+'''
+def clockwiseOrder(hull):
+    if len(hull) <= 1:
+        return hull
+    xavg = sum(p[0] for p in hull) / len(hull)
+    yavg = sum(p[1] for p in hull) / len(hull)
+    angle = lambda i: ((math.atan2(hull[i][1] - yavg, hull[i][0] - xavg) + 2 * math.pi) % (2 * math.pi))
+    start = min(range(len(hull)), key=angle)
+    return hull[start:] + hull[:start]
 
-    # Clockwise sort the points because our splicing was awful
-    clockwiseSort(points)
-    return points
+
+'''
+Given a list of points sorted by x (then y) and a range lo:hi of it,
+computes the hull of that range with divide and conquer.
+'''
+def hullOfRange(points, lo, hi):
+    # Base case because a few dozen points are quicker done directly
+    if hi - lo <= BASE_SIZE:
+        return baseHull(points[lo:hi])
+
+    # Split in the middle, but keep points with the same x on the same side
+    # so a vertical line separates the halves
+    x = points[(lo + hi) // 2][0]
+    mid = (lo + hi) // 2
+    while mid > lo and points[mid - 1][0] == x:
+        mid -= 1
+    if mid == lo:
+        mid = (lo + hi) // 2
+        while mid < hi and points[mid][0] == x:
+            mid += 1
+        # Every point is on one vertical line
+        if mid == hi:
+            return baseHull(points[lo:hi])
+
+    return merge(hullOfRange(points, lo, mid), hullOfRange(points, mid, hi))
 
 
 '''
-The merge function takes in the split left and right hull (x, y) list points and the midpoint.
-It finds the upper and lower tangents to create the hull and returns th
-e points of that hull 
-to be merged recursively in computeHull
+Given a (N, 2) array of points,
+returns the corners of the Akl-Toussaint octagon:
+the points with the smallest and largest x, y, x + y and x - y,
+in counter-clockwise order, repeats dropped.
 '''
-def merge(left, right, midpoint):
-    # Right most point of left hull
-    lh_right = max(left, key=lambda point: point[0])
-    # Left most point of right hull
-    rh_left = min(right, key=lambda point: point[0])
+def extremes(points):
+    x = points[:, 0]
+    y = points[:, 1]
+    order = [np.argmin(x), np.argmin(x + y), np.argmin(y), np.argmax(x - y),
+             np.argmax(x), np.argmax(x + y), np.argmax(y), np.argmin(x - y)]
+    corners = []
+    for i in order:
+        corner = tuple(points[i])
+        if not corners or (corner != corners[-1] and corner != corners[0]):
+            corners.append(corner)
+    return corners
 
-    # Gets the index of the two closest points
-    lh_index = left.index(lh_right)
-    rh_index = right.index(rh_left)
 
-    # Len of Left and Right
-    len_right = len(right)
-    len_left = len(left)
+'''
+Given a (N, 2) array of points,
+throws away in bulk every point strictly inside the octagon from extremes(),
+since none of them can be on the hull.
+Returns the points that are left.
+'''
+def aklToussaint(points):
+    corners = extremes(points)
+    if len(corners) < 3:
+        return points
+    x = points[:, 0]
+    y = points[:, 1]
+    inside = np.ones(len(points), dtype=bool)
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        # Only drop points that are inside even allowing for rounding
+        left = (b[0] - a[0]) * (y - a[1])
+        right = (b[1] - a[1]) * (x - a[0])
+        inside &= left - right > ERRBOUND * (np.abs(left) + np.abs(right))
+    return points[~inside]
 
-    # Right Hull
-    uhr_point = right[rh_index]
-    lhr_point = right[rh_index]
-    # Left Hull
-    uhl_point = left[lh_index]
-    lhl_point = left[lh_index]
 
-    # Upper yint
-    upper_yint = yint(uhr_point, uhl_point, midpoint, 0, sys.maxsize)
-    # Lower yint
-    lower_yint = yint(lhr_point, lhl_point, midpoint, 0, sys.maxsize)
+'''
+Given a (N, 2) float64 array of points,
+computes their hull in the same form as baseHull.
+The prefilter and the sort are vectorized, so only the points that survive
+aklToussaint go through the monotone chain one at a time.
+'''
+def arrayHull(points):
+    if len(points) == 0:
+        return []
+    points = aklToussaint(points)
+    points = points[np.lexsort((points[:, 1], points[:, 0]))]
+    # Drop repeats, which are next to each other once sorted
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return baseHull([tuple(p) for p in points[keep].tolist()])
 
-    while True:
-        changed = False
 
-        # Compares the current Y-Int to the next value's Y-Int
-        # Upper Hull, Y Int should be lower
-        # Check upper right
-        # if the following points intercept is greater than the current point and
-        # if the current point index is not the length of the list
-        if yint(right[(right.index(uhr_point) + 1) % len_right], uhl_point, midpoint, 0, sys.maxsize)[1] <= upper_yint[
-            1] and \
-                right.index(uhr_point) != ((right.index(uhr_point) + 1) % len_right):
-            # checks to see if the next point is below in case the midpoint lies on one of the tests
-            if right[(right.index(uhr_point) + 1) % len_right][1] > uhr_point[1]:
-                pass
-            else:
-                uhr_point = right[(right.index(uhr_point) + 1) % len_right]
-                upper_yint = yint(uhr_point, uhl_point, midpoint, 0, sys.maxsize)
-                changed = True
+'''
+computeHull for a (N, 2) float64 array (or anything np.asarray can make one of).
+'''
+def numpyHull(points):
+    if np is None:
+        raise ImportError("the numpy backend needs numpy")
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return clockwiseOrder(arrayHull(points))
+
+
+'''
+Computes the convex hull of points using the divide-and-conquer algorithm.
+points is a list of (x,y) values; it is not modified.
+The points are sorted by x once, each half is a range of that sorted list,
+and merging two hulls only walks the hulls themselves, so it runs in
+O(n log n).
+Returns the hull in clockwise order (on the screen), starting where
+clockwiseSort would start it, with duplicate and collinear points left out.
+So when we return points this will make it draw from point to point in the list
+and connect the last one with the first one
+backend="numpy" takes a (N, 2) array instead and uses numpyHull,
+which is much faster for millions of points, and backend="parallel"
+splits such an array across processes with parallelhull.parallelHull.
+'''
+def computeHull(points, backend="python"):
+    if backend == "numpy":
+        return numpyHull(points)
+    if backend == "parallel":
+        from parallelhull import parallelHull
+        return parallelHull(points)
+    if backend != "python":
+        raise ValueError("unknown backend: %r" % (backend,))
+    points = sorted(set(map(tuple, points)))
+    if not points:
+        return []
+    return clockwiseOrder(hullOfRange(points, 0, len(points)))
+
 
-        # Check upper left
-        # if the following points intercept is greater than the current point and
-        # if the current point index is not the length of the list
-        if yint(uhr_point, left[(left.index(uhl_point) - 1) % len_left], midpoint, 0, sys.maxsize)[1] <= upper_yint[
-            1] and \
-                left.index(uhl_point) != ((left.index(uhl_point) - 1) % len_left):
-            # checks to see if the next point is below in case the midpoint lies on one of the tests
-            if left[(left.index(uhl_point) - 1) % len_left][1] > uhl_point[1]:
-                pass
+'''
+The merge function takes the hulls of a left and a right set of points
+(counter-clockwise, as computed here), where every point of left is
+strictly left of every point of right.
+It finds the upper and lower tangents by walking index pointers around
+each hull, so it takes time proportional to the size of the hulls,
+and returns the hull of both in the same form.
+'''
+def merge(left, right):
+    m = len(left)
+    k = len(right)
+
+    # Upper tangent, starting from the highest of the facing points
+    i = max(range(m), key=lambda a: (left[a][0], left[a][1]))
+    j = min(range(k), key=lambda b: (right[b][0], -right[b][1]))
+    changed = True
+    while changed:
+        changed = False
+        # Walk up the left hull (counter-clockwise) while the next point is above the line
+        while True:
+            p = left[(i + 1) % m]
+            turn = orientation(left[i], right[j], p)
+            if turn > 0 or (turn == 0 and p[0] < left[i][0]):
+                i = (i + 1) % m
+                changed = True
             else:
-                uhl_point = left[(left.index(uhl_point) - 1) % len_left]
-                upper_yint = yint(uhr_point, uhl_point, midpoint, 0, sys.maxsize)
+                break
+        # Walk up the right hull (clockwise) while the next point is above the line
+        while True:
+            p = right[(j - 1) % k]
+            turn = orientation(left[i], right[j], p)
+            if turn > 0 or (turn == 0 and p[0] > right[j][0]):
+                j = (j - 1) % k
                 changed = True
-
-        # Lower Hull, Y Int should be higher
-        # Check lower right
-        # if the following points intercept is less than the current point and
-        # if the current point index is not the length of the list
-        if yint(right[(right.index(lhr_point) - 1) % len_right], lhl_point, midpoint, 0, sys.maxsize)[1] >= lower_yint[
-            1] and \
-                right.index(lhr_point) != ((right.index(lhr_point) - 1) % len_right):
-            # checks to see if the next point is above in case the midpoint lies on one of the tests
-            if right[(right.index(lhr_point) - 1) % len_right][1] < lhr_point[1]:
-                pass
             else:
-                lhr_point = right[(right.index(lhr_point) - 1) % len_right]
-                lower_yint = yint(lhr_point, lhl_point, midpoint, 0, sys.maxsize)
+                break
+    upper_left, upper_right = i, j
+
+    # Lower tangent, starting from the lowest of the facing points
+    i = max(range(m), key=lambda a: (left[a][0], -left[a][1]))
+    j = 0
+    changed = True
+    while changed:
+        changed = False
+        # Walk down the left hull (clockwise) while the next point is below the line
+        while True:
+            p = left[(i - 1) % m]
+            turn = orientation(left[i], right[j], p)
+            if turn < 0 or (turn == 0 and p[0] < left[i][0]):
+                i = (i - 1) % m
                 changed = True
-
-        # Check lower left
-        # if the following points intercept is less than the current point and
-        # if the current point index is not the length of the list
-        if yint(lhr_point, left[(left.index(lhl_point) + 1) % len_left], midpoint, 0, sys.maxsize)[1] >= lower_yint[
-            1] and \
-                left.index(lhl_point) != ((left.index(lhl_point) + 1) % len_left):
-            # checks to see if the next point is above in case the midpoint lies on one of the tests
-            if left[(left.index(lhl_point) + 1) % len_left][1] < lhl_point[1]:
-                pass
             else:
-                lhl_point = left[(left.index(lhl_point) + 1) % len_left]
-                lower_yint = yint(lhr_point, lhl_point, midpoint, 0, sys.maxsize)
+                break
+        # Walk down the right hull (counter-clockwise) while the next point is below the line
+        while True:
+            p = right[(j + 1) % k]
+            turn = orientation(left[i], right[j], p)
+            if turn < 0 or (turn == 0 and p[0] > right[j][0]):
+                j = (j + 1) % k
                 changed = True
+            else:
+                break
+    lower_left, lower_right = i, j
 
-        # If not true, we break out of loop because there are no more changes
-        if not changed:
-            break
+    # Along the bottom of the right hull, then back along the top of the left one,
+    # starting again from left[0] since it is the leftmost point
+    rights = walk(right, lower_right, upper_right)
+    lefts = walk(left, upper_left, lower_left)
+    start = (-upper_left) % m
+    return lefts[start:] + rights + lefts[:start]
 
-    # Outside of loop
-    r_right = right[right.index(uhr_point):] + right[:right.index(uhr_point)]
-    r_left = left[left.index(lhl_point):] + left[:left.index(lhl_point)]
 
-    # splices the points together
-    points = r_right[:r_right.index(lhr_point)]
-    points.append(lhr_point)
+'''
+Given (N, 2) arrays a, b and p (or anything that broadcasts to that),
+returns the sign of orientation(a[i], b[i], p[i]) for every i as an array of
+-1, 0 and 1. The floating-point test and its error bound are vectorized;
+orientation itself is only called for the rows where the sign is in doubt.
+'''
+def orientationSigns(a, b, p):
+    a, b, p = np.broadcast_arrays(a, b, p)
+    left = (b[:, 0] - a[:, 0]) * (p[:, 1] - a[:, 1])
+    right = (b[:, 1] - a[:, 1]) * (p[:, 0] - a[:, 0])
+    det = left - right
+    signs = np.sign(det).astype(np.int8)
+    doubt = np.flatnonzero(np.abs(det) <= ERRBOUND * (np.abs(left) + np.abs(right)))
+    for i in doubt.tolist():
+        turn = orientation(a[i].tolist(), b[i].tolist(), p[i].tolist())
+        signs[i] = (turn > 0) - (turn < 0)
+    return signs
+
 
-    points = points + r_left[:r_left.index(uhl_point)]
-    points.append(uhl_point)
+'''
+The hull of a set of points, with the queries that get asked of it many times.
+The corners are computed once (with computeHull and the given backend)
+and kept as a list, in computeHull's order, and as a (h, 2) float64 array.
+Counter-clockwise with y up, which is what the queries rely on.
+'''
+class Hull:
+    def __init__(self, points, backend="python"):
+        self.vertices = computeHull(points, backend)
+        if np is not None:
+            self.array = np.array(self.vertices, dtype=np.float64).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def __iter__(self):
+        return iter(self.vertices)
+
+    def __getitem__(self, i):
+        return self.vertices[i]
+
+    '''
+    Returns True if point is inside the hull or on its boundary.
+    The corners seen from the first one split the hull into triangular wedges;
+    a binary search finds the wedge point is in, then one more test
+    says which side of the wedge's outer edge it is on: O(log h) in all.
+    '''
+    def contains(self, point):
+        v = self.vertices
+        h = len(v)
+        if h <= 2:
+            return onSegment(v, tuple(point))
+        if orientation(v[0], v[1], point) < 0 or orientation(v[0], v[-1], point) > 0:
+            return False
+        lo, hi = 1, h - 1
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if orientation(v[0], v[mid], point) >= 0:
+                lo = mid
+            else:
+                hi = mid
+        return orientation(v[lo], v[lo + 1], point) >= 0
+
+    '''
+    contains() for a (N, 2) array of points at once;
+    returns an array of N booleans.
+    The binary search runs for every point together, log h vectorized steps.
+    '''
+    def containsMany(self, points):
+        if np is None:
+            raise ImportError("containsMany needs numpy")
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        v = self.array
+        h = len(v)
+        if h <= 2:
+            return np.array([self.contains(p) for p in points.tolist()], dtype=bool)
+        inside = (orientationSigns(v[0], v[1], points) >= 0) & (orientationSigns(v[0], v[-1], points) <= 0)
+        lo = np.ones(len(points), dtype=np.intp)
+        hi = np.full(len(points), h - 1, dtype=np.intp)
+        # Points outside every wedge go through the search too, and are ignored
+        while True:
+            searching = hi - lo > 1
+            if not searching.any():
+                break
+            mid = (lo + hi) // 2
+            left = orientationSigns(v[0], v[mid], points) >= 0
+            lo = np.where(searching & left, mid, lo)
+            hi = np.where(searching & ~left, mid, hi)
+        return inside & (orientationSigns(v[lo], v[lo + 1], points) >= 0)
+
+    '''
+    Goes once round the hull with rotating calipers: for every edge,
+    the corner farthest from it (the width direction)
+    and the corners farthest forward and back along it.
+    Yields (i, far, front, back) per edge i, as indices into vertices.
+    Each pointer only moves forward, so the whole walk is O(h).
+    '''
+    def calipers(self):
+        v = self.vertices
+        h = len(v)
+        edge = lambda i: (v[(i + 1) % h][0] - v[i][0], v[(i + 1) % h][1] - v[i][1])
+        along = lambda i, j: edge(i)[0] * v[j][0] + edge(i)[1] * v[j][1]
+        far = max(range(h), key=lambda j: orientation(v[0], v[1], v[j]))
+        front = max(range(h), key=lambda j: along(0, j))
+        back = min(range(h), key=lambda j: along(0, j))
+        for i in range(h):
+            while orientation(v[i], v[(i + 1) % h], v[(far + 1) % h]) > orientation(v[i], v[(i + 1) % h], v[far]):
+                far = (far + 1) % h
+            while along(i, (front + 1) % h) > along(i, front):
+                front = (front + 1) % h
+            while along(i, (back + 1) % h) < along(i, back):
+                back = (back + 1) % h
+            yield i, far, front, back
+
+    '''
+    Returns the largest distance between two points of the hull.
+    The farthest pair is a pair of corners touching parallel calipers,
+    which calipers() passes on its way round.
+    '''
+    def diameter(self):
+        v = self.vertices
+        h = len(v)
+        if h <= 2:
+            return math.sqrt(distanceSquared(v[0], v[-1])) if v else 0.0
+        best = 0
+        for i, far, front, back in self.calipers():
+            best = max(best, distanceSquared(v[i], v[far]), distanceSquared(v[(i + 1) % h], v[far]))
+        return math.sqrt(best)
+
+    '''
+    Returns the width of the hull: the smallest distance between
+    two parallel lines with the hull between them.
+    One of the lines always lies along an edge, so it is the smallest,
+    over the edges, of the distance to the corner farthest from that edge.
+    '''
+    def width(self):
+        v = self.vertices
+        h = len(v)
+        if h <= 2:
+            return 0.0
+        return min(orientation(v[i], v[(i + 1) % h], v[far]) / math.sqrt(distanceSquared(v[i], v[(i + 1) % h]))
+                   for i, far, front, back in self.calipers())
+
+    '''
+    Returns the rectangle of least area containing the hull,
+    as its four corners counter-clockwise (y up).
+    One side of it always lies along an edge of the hull (Freeman and Shapira),
+    and calipers() gives the other three sides for each edge.
+    A hull of one or two points gives a flat rectangle with repeated corners.
+    '''
+    def minAreaRect(self):
+        v = self.vertices
+        h = len(v)
+        if h <= 2:
+            return [v[0], v[-1], v[-1], v[0]] if v else []
+        best = None
+        for i, far, front, back in self.calipers():
+            a = v[i]
+            length = math.sqrt(distanceSquared(a, v[(i + 1) % h]))
+            ux = (v[(i + 1) % h][0] - a[0]) / length
+            uy = (v[(i + 1) % h][1] - a[1]) / length
+            # Along the edge and away from it, inside the hull, measured from a
+            forward = (v[front][0] - a[0]) * ux + (v[front][1] - a[1]) * uy
+            backward = (v[back][0] - a[0]) * ux + (v[back][1] - a[1]) * uy
+            height = (v[far][1] - a[1]) * ux - (v[far][0] - a[0]) * uy
+            area = (forward - backward) * height
+            if best is None or area < best[0]:
+                best = (area, a, ux, uy, forward, backward, height)
+        area, a, ux, uy, forward, backward, height = best
+        corner = lambda s, t: (a[0] + s * ux - t * uy, a[1] + s * uy + t * ux)
+        return [corner(backward, 0), corner(forward, 0), corner(forward, height), corner(backward, height)]
+
+
+'''
+Given the hull of at most two points and a point,
+returns True if the point is one of them or on the segment between them.
+'''
+def onSegment(hull, point):
+    if not hull:
+        return False
+    a, b = hull[0], hull[-1]
+    return (orientation(a, b, point) == 0
+            and min(a[0], b[0]) <= point[0] <= max(a[0], b[0])
+            and min(a[1], b[1]) <= point[1] <= max(a[1], b[1]))
 
-    # gets rid of duplicates
-    points = list(set(points))
 
-    return points
+def distanceSquared(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
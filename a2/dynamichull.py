@@ -0,0 +1,77 @@
+from bisect import bisect_left
+from convexhull import clockwiseOrder, orientation
+
+'''
+A convex hull that points can be added to one at a time,
+for when points keep arriving (clicks, a telemetry feed)
+and recomputing the whole hull on every insert would be too slow.
+
+The hull is kept as its lower and upper chains,
+each a list of its corners sorted by (x, y):
+the same chains the monotone chain algorithm builds.
+A new point is found in each chain with a binary search,
+so a point inside the hull is rejected in O(log h) with one orientation test per chain.
+A point that is on the hull is put in its place
+and the corners it makes redundant are removed from either side of it;
+every corner is removed at most once, so that part is amortized O(1).
+The list insert and delete are memory moves of the chain done in C,
+which for the hull sizes seen in practice cost less than a balanced tree would in Python.
+'''
+class DynamicHull:
+    def __init__(self, points=()):
+        self.lower = []
+        self.upper = []
+        for p in points:
+            self.insert(p)
+
+    '''
+    Adds point to the set.
+    Returns True if it is now a corner of the hull,
+    False if it was inside (or on) the hull already.
+    '''
+    def insert(self, point):
+        point = tuple(point)
+        # The lower chain turns left at every corner, the upper one right
+        lower = insertChain(self.lower, point, 1)
+        upper = insertChain(self.upper, point, -1)
+        return lower or upper
+
+    '''
+    Returns the hull of every point inserted so far,
+    in the same clockwise order computeHull gives.
+    '''
+    def hull(self):
+        if len(self.lower) <= 1:
+            return list(self.lower)
+        return clockwiseOrder(self.lower[:-1] + self.upper[:0:-1])
+
+    def __len__(self):
+        if len(self.lower) <= 1:
+            return len(self.lower)
+        return len(self.lower) + len(self.upper) - 2
+
+
+'''
+Given a chain sorted by (x, y), a new point p,
+and the sign of the turn the chain makes at each corner,
+puts p in the chain if it belongs there
+and takes out the corners it makes redundant.
+Returns True if p was added.
+'''
+def insertChain(chain, p, sign):
+    i = bisect_left(chain, p)
+    if i < len(chain) and chain[i] == p:
+        return False
+    # Between two corners, p only counts if it turns the right way
+    if 0 < i < len(chain) and orientation(chain[i - 1], p, chain[i]) * sign <= 0:
+        return False
+
+    chain.insert(i, p)
+    # Corners before p that no longer turn the right way
+    while i >= 2 and orientation(chain[i - 2], chain[i - 1], p) * sign <= 0:
+        del chain[i - 1]
+        i -= 1
+    # And after it
+    while i + 2 < len(chain) and orientation(p, chain[i + 1], chain[i + 2]) * sign <= 0:
+        del chain[i + 1]
+    return True
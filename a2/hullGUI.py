@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
-# if using python 2, swap the next two lines
+# if using python 2, swap the next four lines
 # from Tkinter import *
+# import tkFileDialog as filedialog, Queue as queue
 from tkinter import *
-import copy
+from tkinter import filedialog
+import math
+import queue
+import sys
+import threading
+import convexhull
 from convexhull import computeHull
 
+# The numpy backend spends its time in sorts that let go of the GIL,
+# so the event loop keeps running while it works
+BACKEND = "python" if convexhull.np is None else "numpy"
+
+# How often (ms) the event loop looks for a finished hull
+POLL_INTERVAL = 50
+
+# Past this many points, points are drawn as dots on one image, not a ram each
+SPRITE_LIMIT = 1000
+
 
 def hello(event):
     print("Single Click, Button-l") 
@@ -16,28 +32,96 @@ def addPoint(event):
 def drawPoint(canvas,x,y):
 	# r = 4
 	# id = canvas.create_oval(x-r,y-r,x+r,y+r)
+	if len(points) >= SPRITE_LIMIT:
+		x, y = int(x), int(y)
+		if 1 <= x < canvas_width-2 and 1 <= y < canvas_height-2:
+			dots.put("black", to=(x-1, y-1, x+2, y+2))
+		return dots_id
 	id = canvas.create_image((x,y),image=ram,state=NORMAL)
 	return id
 
 def showPoints(event):
 	print(points)
 
+# Reads points from a text file, one "x,y" or "x y" per line
+# (blank lines and lines starting with # are skipped)
+# nan and inf are rejected, since the hull cannot be computed with them
+def readPoints(path):
+	loaded = []
+	with open(path) as input_file:
+		for line in input_file:
+			line = line.strip()
+			if not line or line.startswith("#"):
+				continue
+			x, y = line.replace(",", " ").split()
+			x, y = float(x), float(y)
+			if not (math.isfinite(x) and math.isfinite(y)):
+				raise ValueError("%s: not a finite point: %r" % (path, line))
+			loaded.append((x, y))
+	return loaded
+
+def loadPoints(path=None):
+	if path is None:
+		path = filedialog.askopenfilename(title="Load points")
+		if not path:
+			return
+	for x, y in readPoints(path):
+		drawPoint(w, x, y)
+		points.append((x, y))
+	drawHull()
+
+# Runs in the background: computes the hull of a copy of the points
+# and hands it to the event loop, which alone touches the canvas
+# If that fails it hands over None, so the event loop still starts the next one
+def hullWorker(snapshot, generation):
+	try:
+		hull = computeHull(snapshot, BACKEND)
+	except Exception as error:
+		sys.stderr.write("hull failed: %s\n" % error)
+		hull = None
+	results.put((generation, hull))
+
 def drawHull():
-	hull = copy.copy(computeHull(points))
-	hull.append(hull[0])
-	for i in range(0,len(hull)-1):
-		x1 = hull[i][0]
-		y1 = hull[i][1]
-		x2 = hull[i+1][0]
-		y2 = hull[i+1][1]
-		w.create_line(x1, y1, x2, y2, width=3)
+	global requested, running
+	requested += 1
+	if not running:
+		running = True
+		threading.Thread(target=hullWorker, args=(list(points), requested), daemon=True).start()
+
+# Replaces the one polyline item with the newest hull (leaving the old one
+# if it failed), and starts over if points were added while it was being computed
+def pollHull():
+	global hull_id, running
+	try:
+		generation, hull = results.get_nowait()
+	except queue.Empty:
+		master.after(POLL_INTERVAL, pollHull)
+		return
+	if hull is not None:
+		if hull_id is not None:
+			w.delete(hull_id)
+			hull_id = None
+		if len(hull) >= 2:
+			coords = [c for point in hull + hull[:1] for c in point]
+			hull_id = w.create_line(*coords, width=3)
+	if generation < requested:
+		threading.Thread(target=hullWorker, args=(list(points), requested), daemon=True).start()
+	else:
+		running = False
+	master.after(POLL_INTERVAL, pollHull)
 
 
 master = Tk()
 points = []
+results = queue.Queue()
+requested = 0
+running = False
+hull_id = None
 
 submit_button = Button(master, text="Draw Hull", command=drawHull)
 submit_button.pack()
+load_button = Button(master, text="Load Points", command=loadPoints)
+load_button.pack()
 quit_button = Button(master, text="Quit", command=master.quit)
 quit_button.pack()
 
@@ -47,7 +131,14 @@ w = Canvas(master,
            width=canvas_width,
            height=canvas_height)
 ram = PhotoImage(file="ram-sm.gif")
+dots = PhotoImage(width=canvas_width, height=canvas_height)
+dots_id = w.create_image((0,0),image=dots,anchor=NW)
 w.pack()
 w.bind('<Button-1>', addPoint)
 
+# python hullGUI.py [points.txt] loads the file at startup
+if len(sys.argv) > 1:
+	loadPoints(sys.argv[1])
+master.after(POLL_INTERVAL, pollHull)
+
 w.mainloop()
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from convexhull import arrayHull, clockwiseOrder, merge, numpyHull
+
+# Below this many points per worker it is not worth starting processes
+MIN_SLAB = 1000000
+
+
+'''
+Runs in a worker: attaches to the shared array of points
+and computes the hull of rows lo:hi of it.
+Only the hull goes back to the parent, never the points.
+'''
+def slabHull(name, count, lo, hi, spawned):
+    shm = shared_memory.SharedMemory(name=name)
+    if spawned:
+        # A spawned worker has its own resource tracker, which would remove
+        # the block when the worker exits; the parent owns it
+        resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        points = np.ndarray((count, 2), dtype=np.float64, buffer=shm.buf)
+        return arrayHull(points[lo:hi])
+    finally:
+        del points
+        shm.close()
+
+
+'''
+Splits points into slabs by x value, so that equal x values always land
+in the same slab and merge() can join neighbouring slab hulls.
+Returns the points reordered slab by slab, and where each slab starts.
+'''
+def slabs(points, count):
+    x = points[:, 0]
+    cuts = np.unique(np.quantile(x, np.linspace(0, 1, count + 1)[1:-1]))
+    slab = np.searchsorted(cuts, x, side="right").astype(np.uint16)
+    # A stable sort of small integers is a radix sort in NumPy, so this is linear
+    order = np.argsort(slab, kind="stable")
+    starts = np.searchsorted(slab[order], np.arange(len(cuts) + 2))
+    return order, starts
+
+
+'''
+computeHull for a large (N, 2) float64 array, using several processes.
+The points are split into x-slabs and copied once into shared memory,
+each worker computes the hull of its slab straight from there,
+and the slab hulls are joined left to right with the tangent-based merge.
+Returns the hull in the same clockwise order as computeHull.
+'''
+def parallelHull(points, workers=None):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    workers = workers or os.cpu_count() or 1
+    count = min(workers, len(points) // MIN_SLAB)
+    if count <= 1:
+        return numpyHull(points)
+
+    order, starts = slabs(points, count)
+    shm = shared_memory.SharedMemory(create=True, size=points.nbytes)
+    try:
+        shared = np.ndarray(points.shape, dtype=np.float64, buffer=shm.buf)
+        np.take(points, order, axis=0, out=shared)
+        del order
+
+        ranges = [(lo, hi) for lo, hi in zip(starts[:-1].tolist(), starts[1:].tolist()) if lo < hi]
+        spawned = multiprocessing.get_start_method() == "spawn"
+        jobs = [(shm.name, len(points), lo, hi, spawned) for lo, hi in ranges]
+        with ProcessPoolExecutor(min(workers, len(ranges))) as pool:
+            hulls = list(pool.map(slabHull, *zip(*jobs)))
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    hull = hulls[0]
+    for right in hulls[1:]:
+        hull = merge(hull, right)
+    return clockwiseOrder(hull)
@@ -0,0 +1,110 @@
+import sys
+from itertools import islice
+import numpy as np
+from convexhull import arrayHull, baseHull, clockwiseOrder
+
+'''
+Convex hulls of point sets too big to hold in memory.
+Points are read a chunk at a time, each chunk is reduced to its hull,
+and the hulls are folded together as they come,
+so memory is bounded by one chunk plus the hull.
+
+Two kinds of file are read:
+text files with one point per line, "x,y" or "x y"
+(blank lines and lines starting with # are skipped),
+and binary files of little-endian float64 x, y pairs,
+which are memory-mapped rather than read.
+'''
+
+# Points per chunk unless told otherwise
+CHUNK_SIZE = 1000000
+
+
+'''
+Given two hulls (as baseHull returns them), returns the hull of both.
+merge() needs its hulls on either side of a vertical line,
+which chunks of a file are not, so this runs the monotone chain
+over the corners of both instead: O(h log h), whatever the chunk size was.
+'''
+def union(a, b):
+    return baseHull(sorted(set(a + b)))
+
+
+'''
+Given chunks of points as (N, 2) arrays,
+returns the hull of all of them in computeHull's clockwise order.
+'''
+def foldHulls(chunks):
+    hull = []
+    for chunk in chunks:
+        hull = union(hull, arrayHull(np.asarray(chunk, dtype=np.float64).reshape(-1, 2)))
+    return clockwiseOrder(hull)
+
+
+'''
+Yields a (N, 2) array, memory-mapped or in memory, chunkSize rows at a time.
+'''
+def arrayChunks(points, chunkSize=CHUNK_SIZE):
+    for start in range(0, len(points), chunkSize):
+        yield np.asarray(points[start:start + chunkSize], dtype=np.float64)
+
+
+'''
+Yields the points of a text file, chunkSize lines at a time.
+Raises ValueError naming the line if one does not hold exactly two values.
+'''
+def textChunks(path, chunkSize=CHUNK_SIZE):
+    number = 0
+    with open(path) as input_file:
+        while True:
+            lines = list(islice(input_file, chunkSize))
+            if not lines:
+                break
+            rows = []
+            for line in lines:
+                number += 1
+                row = line.replace(",", " ").split()
+                if not row or row[0].startswith("#"):
+                    continue
+                if len(row) != 2:
+                    raise ValueError("%s line %d: expected x y, got %r" % (path, number, line.strip()))
+                rows.append(row)
+            if rows:
+                yield np.array(rows, dtype=np.float64)
+
+
+'''
+Memory-maps a binary file of little-endian float64 x, y pairs
+as a (N, 2) array.
+'''
+def mapPoints(path):
+    points = np.memmap(path, dtype="<f8", mode="r")
+    if len(points) % 2:
+        raise ValueError("%s does not hold whole (x, y) pairs" % path)
+    return points.reshape(-1, 2)
+
+
+'''
+Computes the hull of the points in a file, a chunk at a time.
+binary says which kind of file it is;
+if it is not given, files ending in .bin or .f64 are taken as binary.
+'''
+def hullFromFile(path, chunkSize=CHUNK_SIZE, binary=None):
+    if binary is None:
+        binary = path.endswith((".bin", ".f64"))
+    if binary:
+        return foldHulls(arrayChunks(mapPoints(path), chunkSize))
+    return foldHulls(textChunks(path, chunkSize))
+
+
+'''
+Computes the hull of a (N, 2) array, such as a np.memmap, a chunk at a time.
+'''
+def hullFromArray(points, chunkSize=CHUNK_SIZE):
+    return foldHulls(arrayChunks(points, chunkSize))
+
+
+if __name__ == "__main__":
+    # python streamhull.py points.csv|points.bin
+    for x, y in hullFromFile(sys.argv[1]):
+        sys.stdout.write("%r %r\n" % (x, y))
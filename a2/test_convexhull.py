@@ -0,0 +1,309 @@
+#!/usr/bin/python
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+from fractions import Fraction
+import convexhull
+from dynamichull import DynamicHull
+
+
+def naiveHull(points):
+    """Gift wrapping, a different algorithm to check against: O(nh)."""
+    points = list(set(points))
+    if len(points) <= 2:
+        hull = points
+    else:
+        hull = []
+        p = min(points)
+        while True:
+            hull.append(p)
+            # The next corner has every other point to its left, or on the way to it
+            q = points[0] if points[0] != p else points[1]
+            for r in points:
+                turn = exactSign(p, q, r)
+                if turn < 0 or (turn == 0 and distance(p, r) > distance(p, q)):
+                    q = r
+            p = q
+            if p == hull[0]:
+                break
+    convexhull.clockwiseSort(hull)
+    return hull
+
+
+def distance(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+
+
+def exactSign(a, b, c):
+    a, b, c = [(Fraction(x), Fraction(y)) for x, y in (a, b, c)]
+    turn = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (turn > 0) - (turn < 0)
+
+
+class TestConvexHull(unittest.TestCase):
+    def testSquare(self):
+        points = [(0, 0), (10, 0), (10, 10), (0, 10), (5, 5), (5, 0), (3, 7)]
+        self.assertEqual(convexhull.computeHull(points), [(10, 10), (0, 10), (0, 0), (10, 0)])
+
+    def testSmall(self):
+        self.assertEqual(convexhull.computeHull([]), [])
+        self.assertEqual(convexhull.computeHull([(1, 1), (1, 1)]), [(1, 1)])
+        self.assertEqual(sorted(convexhull.computeHull([(0, 0), (2, 2), (1, 1)])), [(0, 0), (2, 2)])
+
+    def testDoesNotModify(self):
+        points = [(3, 1), (0, 0), (1, 5), (2, 2)]
+        convexhull.computeHull(points)
+        self.assertEqual(points, [(3, 1), (0, 0), (1, 5), (2, 2)])
+
+    def testRandom(self):
+        for seed in range(300):
+            rng = random.Random(seed)
+            size = rng.choice([3, 20, 1000])
+            # Narrow inputs put lots of points on the same vertical lines
+            width = 3 if seed % 4 == 0 else size
+            points = [(rng.randint(0, width), rng.randint(0, size)) for _ in range(rng.randint(1, 40))]
+            self.assertEqual(convexhull.computeHull(points), naiveHull(points), points)
+
+    def testLarge(self):
+        rng = random.Random(1)
+        points = [(rng.randint(0, 1000), rng.randint(0, 1000)) for _ in range(5000)]
+        hull = convexhull.computeHull(points)
+        self.assertEqual(hull, convexhull.clockwiseOrder(convexhull.baseHull(sorted(set(points)))))
+
+    @unittest.skipIf(convexhull.np is None, "needs numpy")
+    def testNumpyBackend(self):
+        for seed in range(200):
+            rng = random.Random(seed)
+            size = rng.choice([3, 20, 1000])
+            points = [(rng.randint(0, size), rng.randint(0, size)) for _ in range(rng.randint(1, 80))]
+            expected = [(float(x), float(y)) for x, y in convexhull.computeHull(points)]
+            array = convexhull.np.array(points, dtype=convexhull.np.float64)
+            self.assertEqual(convexhull.computeHull(array, backend="numpy"), expected)
+            self.assertEqual(convexhull.computeHull(points, backend="numpy"), expected)
+
+    @unittest.skipIf(convexhull.np is None, "needs numpy")
+    def testParallel(self):
+        import parallelhull
+        minimum = parallelhull.MIN_SLAB
+        parallelhull.MIN_SLAB = 100
+        try:
+            for seed in range(5):
+                rng = random.Random(seed)
+                points = [(rng.randint(0, 60), rng.randint(0, 1000)) for _ in range(3000)]
+                array = convexhull.np.array(points, dtype=convexhull.np.float64)
+                self.assertEqual(parallelhull.parallelHull(array, workers=3),
+                                 convexhull.computeHull(array, backend="numpy"))
+        finally:
+            parallelhull.MIN_SLAB = minimum
+
+    def testNearlyCollinear(self):
+        # Shewchuk's example: a tiny grid of points next to the line y = x,
+        # where plain floating point gets many of the signs wrong
+        step = 2.0 ** -53
+        b, c = (12.0, 12.0), (24.0, 24.0)
+        wrong = 0
+        for i in range(64):
+            for j in range(64):
+                a = (0.5 + i * step, 0.5 + j * step)
+                exact = exactSign(a, b, c)
+                turn = convexhull.orientation(a, b, c)
+                self.assertEqual((turn > 0) - (turn < 0), exact, a)
+                self.assertEqual(convexhull.collinear(a, b, c), exact == 0)
+                plain = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+                wrong += (plain > 0) - (plain < 0) != exact
+        self.assertGreater(wrong, 0)
+
+    def testLargeCoordinates(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            # Points rounded onto a line far from the origin, so a few ulps off it
+            (ax, ay), (bx, by) = [(rng.uniform(1e6, 2e6), rng.uniform(1e6, 2e6)) for _ in range(2)]
+            points = []
+            for _ in range(40):
+                t = rng.random()
+                points.append((ax + t * (bx - ax), ay + t * (by - ay)))
+            hull = convexhull.computeHull(points)
+            # The sliver is too thin for clockwiseSort to order reliably, so check the turns instead
+            self.assertEqual(set(hull), set(naiveHull(points)), points)
+            for i in range(len(hull)):
+                self.assertEqual(exactSign(hull[i - 2], hull[i - 1], hull[i]), 1, hull)
+
+    def testUnknownBackend(self):
+        with self.assertRaises(ValueError):
+            convexhull.computeHull([(0, 0)], backend="fortran")
+
+
+class TestHull(unittest.TestCase):
+    def testContains(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            size = rng.choice([3, 20, 1000])
+            points = [(rng.randint(0, size), rng.randint(0, size)) for _ in range(rng.randint(1, 40))]
+            hull = convexhull.Hull(points)
+            queries = points + [(rng.randint(-1, size + 1), rng.randint(-1, size + 1)) for _ in range(100)]
+            # The slow way: on the inside of (or on) every edge
+            v = hull.vertices
+            if len(v) <= 2:
+                expected = [convexhull.onSegment(v, q) for q in queries]
+            else:
+                expected = [all(exactSign(v[i - 1], v[i], q) >= 0 for i in range(len(v))) for q in queries]
+            self.assertEqual([hull.contains(q) for q in queries], expected, points)
+            if convexhull.np is not None:
+                self.assertEqual(hull.containsMany(queries).tolist(), expected, points)
+
+    def testExtents(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            points = [(rng.randint(0, 1000), rng.randint(0, 1000)) for _ in range(rng.randint(3, 60))]
+            hull = convexhull.Hull(points)
+            v = hull.vertices
+            if len(v) < 3:
+                continue
+            self.assertAlmostEqual(hull.diameter(), max(math.sqrt(distance(a, b)) for a in v for b in v))
+            # Every edge with the corner farthest from it, and the rectangle on that edge
+            widths = []
+            areas = []
+            for i in range(len(v)):
+                a, b = v[i - 1], v[i]
+                length = math.sqrt(distance(a, b))
+                along = [((p[0] - a[0]) * (b[0] - a[0]) + (p[1] - a[1]) * (b[1] - a[1])) / length for p in v]
+                away = [convexhull.orientation(a, b, p) / length for p in v]
+                widths.append(max(away))
+                areas.append((max(along) - min(along)) * max(away))
+            self.assertAlmostEqual(hull.width(), min(widths))
+            rectangle = hull.minAreaRect()
+            area = sum(p[0] * q[1] - q[0] * p[1] for p, q in zip(rectangle, rectangle[1:] + rectangle[:1])) / 2
+            self.assertAlmostEqual(area, min(areas), places=6)
+            for p in v:
+                for i in range(4):
+                    self.assertGreater(convexhull.orientation(rectangle[i - 1], rectangle[i], p), -1e-6)
+
+    def testSmall(self):
+        self.assertFalse(convexhull.Hull([]).contains((0, 0)))
+        self.assertEqual(convexhull.Hull([]).diameter(), 0)
+        segment = convexhull.Hull([(0, 0), (4, 2), (2, 1)])
+        self.assertTrue(segment.contains((2, 1)))
+        self.assertFalse(segment.contains((6, 3)))
+        self.assertAlmostEqual(segment.diameter(), math.sqrt(20))
+        self.assertEqual(segment.width(), 0)
+
+
+@unittest.skipIf(convexhull.np is None, "needs numpy")
+class TestStreamHull(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(2)
+        self.points = [(float(rng.randint(0, 300)), float(rng.randint(0, 300))) for _ in range(5000)]
+        self.expected = convexhull.computeHull(self.points)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def testArray(self):
+        import streamhull
+        array = convexhull.np.array(self.points)
+        self.assertEqual(streamhull.hullFromArray(array, chunkSize=333), self.expected)
+
+    def testFiles(self):
+        import streamhull
+        binary = os.path.join(self.directory, "points.bin")
+        convexhull.np.array(self.points, dtype="<f8").tofile(binary)
+        self.assertEqual(streamhull.hullFromFile(binary, chunkSize=1000), self.expected)
+
+        text = os.path.join(self.directory, "points.csv")
+        with open(text, "w") as output:
+            output.write("# x,y\n")
+            for x, y in self.points:
+                output.write("%r,%r\n" % (x, y))
+        self.assertEqual(streamhull.hullFromFile(text, chunkSize=999), self.expected)
+
+    def testBadLines(self):
+        import streamhull
+        text = os.path.join(self.directory, "points.txt")
+        for body in ("0 0\n1 2 3\n", "0 0\n1 1\n\n2\n", "1 2 3\n4 5 6\n7 8 9\n1 1 1\n"):
+            with open(text, "w") as output:
+                output.write(body)
+            line = [i + 1 for i, row in enumerate(body.splitlines()) if row and len(row.split()) != 2][0]
+            with self.assertRaisesRegex(ValueError, "line %d" % line):
+                list(streamhull.textChunks(text, chunkSize=2))
+
+
+@unittest.skipIf(convexhull.np is None, "needs numpy")
+class TestBatchHull(unittest.TestCase):
+    def testSameAsComputeHull(self):
+        import batchhull
+        for seed in range(100):
+            rng = random.Random(seed)
+            groups = []
+            for _ in range(rng.randint(0, 20)):
+                size = rng.choice([3, 20, 1000])
+                width = 3 if seed % 4 == 0 else size
+                groups.append([(rng.randint(0, width), rng.randint(0, size)) for _ in range(rng.randint(0, 40))])
+            coords = [point for group in groups for point in group]
+            offsets = [0]
+            for group in groups:
+                offsets.append(offsets[-1] + len(group))
+            hull, hullOffsets = batchhull.batchHull(coords, offsets)
+            self.assertEqual(len(hullOffsets), len(offsets))
+            for i, group in enumerate(groups):
+                expected = [(float(x), float(y)) for x, y in convexhull.computeHull(group)]
+                self.assertEqual([tuple(p) for p in hull[hullOffsets[i]:hullOffsets[i + 1]].tolist()],
+                                 expected, group)
+
+    def testBadOffsets(self):
+        import batchhull
+        for offsets in ([], [1, 3], [0, 2], [0, 3, 2, 3]):
+            with self.assertRaises(ValueError):
+                batchhull.batchHull([(0, 0), (1, 0), (0, 1)], offsets)
+
+
+class TestBenchHull(unittest.TestCase):
+    def testFuzz(self):
+        import benchhull
+        benchhull.fuzz(3)
+        self.assertEqual(benchhull.referenceHull([(0, 0), (2, 0), (1, 1), (2, 2), (0, 2), (1, 0)]),
+                         [(0, 0), (2, 0), (2, 2), (0, 2)])
+
+    def testTable(self):
+        import io
+        import benchhull
+        out = io.StringIO()
+        benchhull.run([10, 300], benchhull.KINDS, 100, out)
+        lines = [line.split("\t") for line in out.getvalue().splitlines()]
+        self.assertEqual(tuple(lines[0]), benchhull.COLUMNS)
+        self.assertEqual([(line[0], line[1]) for line in lines[1:]],
+                         [(kind, n) for kind in benchhull.KINDS for n in ("10", "300")])
+        # The reference is only run up to --reference-max
+        self.assertEqual([line[5] == "-" for line in lines[1:]], [False, True] * len(benchhull.KINDS))
+
+
+class TestDynamicHull(unittest.TestCase):
+    def testSameAsComputeHull(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            size = rng.choice([3, 20, 1000])
+            hull = DynamicHull()
+            points = []
+            for i in range(rng.randint(1, 50)):
+                point = (rng.randint(0, size), rng.randint(0, size))
+                points.append(point)
+                hull.insert(point)
+                expected = convexhull.computeHull(points)
+                self.assertEqual(hull.hull(), expected, points)
+                self.assertEqual(len(hull), len(expected))
+
+    def testInsideRejected(self):
+        hull = DynamicHull([(0, 0), (10, 0), (10, 10), (0, 10)])
+        self.assertFalse(hull.insert((5, 5)))
+        self.assertFalse(hull.insert((5, 0)))
+        self.assertFalse(hull.insert((0, 0)))
+        self.assertTrue(hull.insert((5, 11)))
+        self.assertEqual(len(hull), 5)
+
+if __name__ == '__main__':
+    unittest.main(argv = sys.argv + ['--verbose'])
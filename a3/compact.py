@@ -0,0 +1,166 @@
+# compact.py
+# Positions of the 2x2x2 cube packed into one small int
+
+"""
+A position in rubik.py is a 24-tuple of face labels.  Since the moves in
+rubik.quarter_twists keep cubie 7 (BDR) where it is and keep the three
+faces of every cubie together, in the same cyclic order, a reachable
+position is fixed by two smaller things:
+   which cubie is in each of the slots 0..6, a permutation of 7 cubies,
+   numbered by its Lehmer code (rank) from 0 to 7! - 1 = 5039;
+   how each of those cubies is twisted, 0, 1 or 2: the twist of slot c
+   is position[3c] % 3 (which of its faces is on the F or B side).
+The twists always add up to a multiple of 3, so the first six fix the
+seventh, and the six of them are read as a base-3 number below 3^6 = 729.
+The code of a position is
+   rank * 729 + twists
+so codes run from 0 to N_STATES - 1 = 3674159, every one reachable.
+
+A move changes the permutation and the twists separately, so instead of
+a move table over all 3.67M codes (22M entries) there are two small ones:
+   PERM_MOVES[rank * 6 + m]    the rank after move m
+   TWIST_MOVES[twists * 6 + m] the twists after move m
+where m indexes rubik.quarter_twists, and apply_move() puts them together.
+A set of positions can then be a bytearray(N_STATES) indexed by code.
+"""
+
+from array import array
+import rubik
+
+CUBIES = 7
+N_PERMS = 5040
+N_TWISTS = 729
+N_STATES = N_PERMS * N_TWISTS
+MOVES = rubik.quarter_twists
+N_MOVES = len(MOVES)
+
+####################################################
+### Permutation ranks
+####################################################
+
+def perm_rank(perm):
+    """
+    Lehmer code of a permutation of 0..n-1: for each place, how many
+    later entries are smaller, read as a factorial-base number.
+    """
+    rank = 0
+    n = len(perm)
+    for i in range(n):
+        smaller = 0
+        for j in range(i + 1, n):
+            if perm[j] < perm[i]:
+                smaller += 1
+        rank = rank * (n - i) + smaller
+    return rank
+
+def perm_unrank(rank, n=CUBIES):
+    """
+    The permutation of 0..n-1 with the given Lehmer code.
+    """
+    digits = []
+    for base in range(1, n + 1):
+        rank, digit = divmod(rank, base)
+        digits.append(digit)
+    left = list(range(n))
+    return tuple([left.pop(digit) for digit in reversed(digits)])
+
+####################################################
+### Encoding
+####################################################
+
+def encode(position):
+    """
+    Code of a position (a 24-tuple as in rubik.py).
+    Raises ValueError if the position is not one the quarter twists can
+    reach from rubik.I: cubie 7 moved, faces of a cubie split up or out
+    of order, or the twists not adding up to a multiple of 3.
+    """
+    if len(position) != 24 or tuple(position[21:]) != (21, 22, 23):
+        raise ValueError("not a reachable position: %s" % rubik.perm_to_string(position))
+    perm = []
+    twists = 0
+    total = 0
+    for c in range(CUBIES):
+        cubie, twist = divmod(position[3 * c], 3)
+        for j in (1, 2):
+            if position[3 * c + j] != 3 * cubie + (twist + j) % 3:
+                raise ValueError("not a reachable position: %s" % rubik.perm_to_string(position))
+        perm.append(cubie)
+        total += twist
+        if c < CUBIES - 1:
+            twists = twists * 3 + twist
+    if sorted(perm) != list(range(CUBIES)) or total % 3 != 0:
+        raise ValueError("not a reachable position: %s" % rubik.perm_to_string(position))
+    return perm_rank(perm) * N_TWISTS + twists
+
+def decode(code):
+    """
+    The position (a 24-tuple as in rubik.py) with the given code.
+    """
+    rank, twists = divmod(code, N_TWISTS)
+    perm = perm_unrank(rank)
+    twist = []
+    for c in range(CUBIES - 1):
+        twists, t = divmod(twists, 3)
+        twist.append(t)
+    twist.reverse()
+    twist.append(-sum(twist) % 3)
+    position = []
+    for c in range(CUBIES):
+        for j in range(3):
+            position.append(3 * perm[c] + (twist[c] + j) % 3)
+    return tuple(position) + (21, 22, 23)
+
+####################################################
+### Move tables
+####################################################
+
+def move_tables():
+    """
+    Builds PERM_MOVES and TWIST_MOVES (see above) from the moves in
+    rubik.quarter_twists.  Applying move m to a position takes the
+    cubie in slot m[3c] // 3 to slot c and adds m[3c] % 3 to its twist.
+    """
+    perm_moves = array('H', [0] * (N_PERMS * N_MOVES))
+    for rank in range(N_PERMS):
+        perm = perm_unrank(rank)
+        for m, move in enumerate(MOVES):
+            perm_moves[rank * N_MOVES + m] = perm_rank([perm[move[3 * c] // 3] for c in range(CUBIES)])
+    twist_moves = array('H', [0] * (N_TWISTS * N_MOVES))
+    for twists in range(N_TWISTS):
+        twist = [0] * CUBIES
+        rest = twists
+        for c in range(CUBIES - 2, -1, -1):
+            rest, twist[c] = divmod(rest, 3)
+        twist[CUBIES - 1] = -sum(twist) % 3
+        for m, move in enumerate(MOVES):
+            moved = 0
+            for c in range(CUBIES - 1):
+                moved = moved * 3 + (twist[move[3 * c] // 3] + move[3 * c]) % 3
+            twist_moves[twists * N_MOVES + m] = moved
+    return perm_moves, twist_moves
+
+PERM_MOVES, TWIST_MOVES = move_tables()
+
+# Code of the solved position
+IDENTITY = encode(rubik.I)
+
+# INVERSE[m] is the index of the move that undoes MOVES[m]
+INVERSE = [MOVES.index(rubik.perm_inverse(move)) for move in MOVES]
+
+def apply_move(m, code):
+    """
+    Code of the position after move MOVES[m]: perm_apply(MOVES[m], decode(code)),
+    by two table lookups.
+    """
+    rank, twists = divmod(code, N_TWISTS)
+    return PERM_MOVES[rank * N_MOVES + m] * N_TWISTS + TWIST_MOVES[twists * N_MOVES + m]
+
+def neighbours(code):
+    """
+    Codes of the positions one quarter twist away, in the order of MOVES.
+    """
+    rank, twists = divmod(code, N_TWISTS)
+    rank *= N_MOVES
+    twists *= N_MOVES
+    return [PERM_MOVES[rank + m] * N_TWISTS + TWIST_MOVES[twists + m] for m in range(N_MOVES)]
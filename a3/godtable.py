@@ -0,0 +1,209 @@
+# godtable.py
+# God's algorithm for the 2x2x2 cube: the distance of every position
+
+"""
+There are only compact.N_STATES = 3674160 positions, so instead of
+searching for each path we can BFS once from the solved position and
+keep the distance of every position from it: at most 14, so 4 bits each,
+two to a byte, 1.8 MB in all.
+Then a path from any position is a greedy descent: take any move to a
+position one closer, at most 14 times, 6 lookups each.
+
+The table is built the first time it is needed and saved to CACHE,
+followed by its CRC-32 (4 bytes, little-endian); after that it is
+memory-mapped, so a process that only solves a few positions only reads
+the pages it touches.  A file of the wrong size, with the wrong checksum,
+or that does not put the solved position at 0 is built again.
+Byte code // 2 holds the distance of code in its low 4 bits if code is
+even and its high 4 bits if it is odd.
+"""
+
+import mmap
+import os
+import sys
+import zlib
+import compact
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gods_table.bin")
+TABLE_SIZE = compact.N_STATES // 2
+FILE_SIZE = TABLE_SIZE + 4
+
+# Distance of a position not reached (yet)
+UNSEEN = 15
+
+# Where table() finds the table, and the table once something asks for it
+_path = CACHE
+_table = None
+
+####################################################
+### Building
+####################################################
+
+def distances():
+    """
+    BFS from the solved position over every code.
+    Returns a bytearray (or numpy array) of the distance of every code.
+    With numpy each level is expanded at once, which takes about a second;
+    without it the BFS is a Python loop of about twenty seconds.
+    """
+    if np is not None:
+        perm_moves = np.array(compact.PERM_MOVES, dtype=np.int64)
+        twist_moves = np.array(compact.TWIST_MOVES, dtype=np.int64)
+        moves = np.arange(compact.N_MOVES)
+        dist = np.full(compact.N_STATES, UNSEEN, dtype=np.uint8)
+        dist[compact.IDENTITY] = 0
+        frontier = np.array([compact.IDENTITY], dtype=np.int64)
+        depth = 0
+        while len(frontier):
+            depth += 1
+            rank, twists = np.divmod(frontier, compact.N_TWISTS)
+            reached = (perm_moves[rank[:, None] * compact.N_MOVES + moves] * compact.N_TWISTS
+                       + twist_moves[twists[:, None] * compact.N_MOVES + moves]).ravel()
+            # Marking them and then looking for the marks drops repeats without a sort
+            dist[reached[dist[reached] == UNSEEN]] = depth
+            frontier = np.flatnonzero(dist == depth)
+        return dist
+
+    dist = bytearray([UNSEEN]) * compact.N_STATES
+    dist[compact.IDENTITY] = 0
+    frontier = [compact.IDENTITY]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for code in frontier:
+            for reached in compact.neighbours(code):
+                if dist[reached] == UNSEEN:
+                    dist[reached] = depth
+                    next_frontier.append(reached)
+        frontier = next_frontier
+    return dist
+
+def build():
+    """
+    The packed table: distances() two to a byte.
+    """
+    dist = distances()
+    if np is not None:
+        return bytearray((dist[0::2] | (dist[1::2] << 4)).tobytes())
+    return bytearray(low | (high << 4) for low, high in zip(dist[0::2], dist[1::2]))
+
+def save(table, path=CACHE):
+    """
+    Writes the table and its checksum to path, through a temporary file
+    so that another process never maps a half-written one.
+    """
+    temp = "%s.%d.tmp" % (path, os.getpid())
+    with open(temp, "wb") as output:
+        output.write(table)
+        output.write(zlib.crc32(table).to_bytes(4, "little"))
+    os.replace(temp, path)
+
+####################################################
+### Loading
+####################################################
+
+def valid(packed, checksum):
+    """
+    Whether a mapped table matches the checksum saved after it and has
+    the solved position at distance 0.
+    """
+    return zlib.crc32(packed) == int.from_bytes(checksum, "little") and distance(compact.IDENTITY, packed) == 0
+
+def mapped(path):
+    """
+    The table saved at path, mapped read-only, or None if it is missing
+    or fails valid().
+    """
+    if not os.path.exists(path) or os.path.getsize(path) != FILE_SIZE:
+        return None
+    with open(path, "rb") as input_file:
+        packed = mmap.mmap(input_file.fileno(), TABLE_SIZE, access=mmap.ACCESS_READ)
+        input_file.seek(TABLE_SIZE)
+        checksum = input_file.read(4)
+    if not valid(packed, checksum):
+        packed.close()
+        return None
+    return packed
+
+def load(path=CACHE):
+    """
+    Maps the table saved at path read-only, building and saving it first
+    if the file is not there or is not a good table.
+    """
+    packed = mapped(path)
+    if packed is None:
+        save(build(), path)
+        packed = mapped(path)
+        if packed is None:
+            raise ValueError("corrupt distance table: %s" % path)
+    return packed
+
+def use(path):
+    """
+    Makes table() use the table at path (CACHE unless told otherwise),
+    mapping it, or building it there, the next time it is asked for.
+    """
+    global _path, _table
+    _path = path
+    _table = None
+
+def table_path():
+    """
+    The path table() uses.
+    """
+    return _path
+
+def table():
+    """
+    The table at table_path(), mapped the first time it is asked for.
+    """
+    global _table
+    if _table is None:
+        _table = load(_path)
+    return _table
+
+####################################################
+### Solving
+####################################################
+
+def distance(code, packed=None):
+    """
+    Number of quarter twists between the position with this code and
+    the solved one.
+    """
+    if packed is None:
+        packed = table()
+    return (packed[code >> 1] >> ((code & 1) << 2)) & 15
+
+def solve(code, packed=None):
+    """
+    A shortest list of move indices (into compact.MOVES) taking the
+    position with this code to the solved one: at each step the first
+    move, in the order of compact.MOVES, to a position one closer.
+    """
+    if packed is None:
+        packed = table()
+    path = []
+    left = distance(code, packed)
+    while left:
+        for m, reached in enumerate(compact.neighbours(code)):
+            if distance(reached, packed) == left - 1:
+                path.append(m)
+                code = reached
+                left -= 1
+                break
+        else:
+            # Every position but the solved one has a neighbour one closer
+            raise ValueError("corrupt distance table")
+    return path
+
+if __name__ == "__main__":
+    # python godtable.py [path]: builds the table and saves it
+    path = sys.argv[1] if len(sys.argv) > 1 else CACHE
+    save(build(), path)
@@ -0,0 +1,108 @@
+# ida.py
+# Optimal solving by iterative-deepening A*, in almost no memory
+
+"""
+IDA* is a depth-first search run again and again with a growing limit on
+moves made plus moves still needed, where moves still needed is a lower
+bound h, so the first path found is a shortest one.  It keeps only the
+current path, unlike BFS, whose frontiers grow to hundreds of thousands
+of positions.
+
+h comes from two pattern tables, built by BFS from the solved position
+over compact's two move tables:
+   PERM_DIST[rank]      moves needed to put every cubie in its slot,
+                        whatever the twists (5040 entries)
+   TWIST_DIST[twists]   moves needed to untwist every cubie,
+                        wherever they are (729 entries)
+Solving the cube does both, so the larger of the two is a lower bound.
+"""
+
+import compact
+
+####################################################
+### Pattern tables
+####################################################
+
+def pattern_table(moves, size, solved):
+    """
+    Distances from solved to every one of size patterns, where
+    moves[pattern * N_MOVES + m] is the pattern after move m
+    (compact.PERM_MOVES or compact.TWIST_MOVES).
+    """
+    dist = bytearray([255]) * size
+    dist[solved] = 0
+    frontier = [solved]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for pattern in frontier:
+            for m in range(compact.N_MOVES):
+                reached = moves[pattern * compact.N_MOVES + m]
+                if dist[reached] == 255:
+                    dist[reached] = depth
+                    next_frontier.append(reached)
+        frontier = next_frontier
+    return dist
+
+PERM_DIST = pattern_table(compact.PERM_MOVES, compact.N_PERMS, compact.IDENTITY // compact.N_TWISTS)
+TWIST_DIST = pattern_table(compact.TWIST_MOVES, compact.N_TWISTS, compact.IDENTITY % compact.N_TWISTS)
+
+# The moves that come before their inverse in compact.MOVES, F, L and U
+CLOCKWISE = set(m for m in range(compact.N_MOVES) if m < compact.INVERSE[m])
+
+def estimate(code):
+    """
+    A lower bound on the moves needed to solve the position with this code.
+    """
+    rank, twists = divmod(code, compact.N_TWISTS)
+    return max(PERM_DIST[rank], TWIST_DIST[twists])
+
+####################################################
+### Search
+####################################################
+
+def search(code, path, limit, last, before):
+    """
+    Depth-first search below code for the solved position, making at most
+    limit more moves after the moves last and (before it) before.
+    Appends the moves to path and returns True if it finds it;
+    otherwise returns the smallest moves-plus-estimate over the limit
+    that it saw, the limit for the next round.
+    Sequences that a shorter or equal one always replaces are skipped:
+    a move undoing the one before, the same quarter twist three times
+    (which is one twist the other way), and the same counter-clockwise
+    twist twice (which is the clockwise one twice).
+    """
+    h = estimate(code)
+    if h == 0:
+        return True
+    if h > limit:
+        return h
+    smallest = None
+    for m, reached in enumerate(compact.neighbours(code)):
+        if m == last and (m == before or m not in CLOCKWISE):
+            continue
+        if last is not None and m == compact.INVERSE[last]:
+            continue
+        path.append(m)
+        found = search(reached, path, limit - 1, m, last)
+        if found is True:
+            return True
+        path.pop()
+        if smallest is None or found + 1 < smallest:
+            smallest = found + 1
+    return smallest
+
+def solve(code):
+    """
+    A shortest list of move indices (into compact.MOVES) taking the
+    position with this code to the solved one.
+    """
+    path = []
+    limit = estimate(code)
+    while True:
+        found = search(code, path, limit, None, None)
+        if found is True:
+            return path
+        limit = found
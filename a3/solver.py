@@ -1,48 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import rubik
-from collections import deque
-
-# Class to store the state of the node
-class node_info:
-    def __init__(self, st, parent, order):
-        self.st = st
-        self.parent = parent
-        self.order = order
-
-# Gets the next frontier
-def next_frontier(frontier, p_nodes):
-    starting_order = frontier[0].order
-
-    # At each iteration, we are looking at the nodes in the frontier of the same order as starting_order
-    while starting_order == frontier[0].order:
-        elm = frontier.popleft()
+import compact
+import godtable
+import ida
+
+# Marks the state a side of the search starts from
+ROOT = compact.N_MOVES + 1
+
+# Expands a frontier by one level
+# States are compact codes, and moves has a byte for every code:
+# 0 if this side has not reached it, else 1 + the index of the move
+# that first reached it (or ROOT), so checking whether a state is new
+# is one lookup and the path can be walked back by undoing the moves
+# Returns the next level: the states first reached at the new depth
+def next_frontier(frontier, moves):
+    new_frontier = []
+    for st in frontier:
         # Changes the rubik state
-        for move in rubik.quarter_twists:
-            move_st = rubik.perm_apply(move, elm.st)
-            # Checks to see if the new move_st is not in the nodes list
-            if move_st not in p_nodes:
-                # new node_info with the new move_st, the move command it took
-                # frontier that was popped, and the new depth of node
-                new_st = node_info(move_st, (move, elm), elm.order + 1)
-                frontier.append(new_st)
-                p_nodes.append(move_st)
+        for m, move_st in enumerate(compact.neighbours(st)):
+            # Checks to see if move_st was not reached before
+            if not moves[move_st]:
+                moves[move_st] = m + 1
+                new_frontier.append(move_st)
+    return new_frontier
+
+# Finds a state both sides have reached, or None if there is not one yet
+# Only the smaller frontier is walked, looking each state up in the other side
+# As long as the frontiers did not meet at the level before, any state found
+# here is on both frontiers, so it is the middle of a shortest path
+def meeting_state(s_frontier, s_moves, e_frontier, e_moves):
+    if len(s_frontier) <= len(e_frontier):
+        frontier, moves = s_frontier, e_moves
+    else:
+        frontier, moves = e_frontier, s_moves
+    for st in frontier:
+        if moves[st]:
+            return st
+    return None
+
+# Returns the moves from a side's root to st, in order
+def path_to(st, moves):
+    path = []
+    while moves[st] != ROOT:
+        m = moves[st] - 1
+        path.append(m)
+        st = compact.apply_move(compact.INVERSE[m], st)
+    path.reverse()
+    return path
+
+# Using 2-way BFS, finds the shortest path from the position with code
+# start_code to the solved one
+# Returns a list of move indices into compact.MOVES
+def bfs_path(start_code):
+    end_code = compact.IDENTITY
 
-"""
-Using 2-way BFS, finds the shortest path from start_position to
-end_position. Returns a list of moves.
-You can use the rubik.quarter_twists move set.
-Each move can be applied using rubik.perm_apply
-"""
-def shortest_path(start, end):
     # Start side of BFS
-    start_init = node_info(start, (None, None), 0)
-    s_frontier = deque([start_init])
-    s_parents = []
+    s_frontier = [start_code]
+    s_moves = bytearray(compact.N_STATES)
+    s_moves[start_code] = ROOT
 
     # End side of BFS
-    end_init = node_info(end, (None, None), 0)
-    e_frontier = deque([end_init])
-    e_parents = []
-    
+    e_frontier = [end_code]
+    e_moves = bytearray(compact.N_STATES)
+    e_moves[end_code] = ROOT
+
     # Flag determines which side we need to advance the frontier
     # When flag is 1 it means that we might advance the left frontier
     # When flag is -1 it means we might advance the right frontier
@@ -50,65 +73,119 @@ def shortest_path(start, end):
 
     # Test to see if the two given states (start, end) are the same
     # We know to return an empty list
+    meet = meeting_state(s_frontier, s_moves, e_frontier, e_moves)
 
-    for l_elm in s_frontier:
-        for r_elm in e_frontier:
-            if l_elm.st == r_elm.st:
-                return []
-
-    found = False
-
-    # Given that we have not found a solution, the function will alternate between the start and end 
+    # Given that we have not found a solution, the function will alternate between the start and end
     # sides (bidirectional) to create a new frontier and check its values for a solution
-    while not found:
-        # Checks the depth of the nodes in both frontiers
-        # If their order exceeds 7, then there is no shortest path
-        if s_frontier[0].order > 6 and e_frontier[0].order > 6:
+    while meet is None:
+        # Every reachable position is within 14 moves, 7 from each side,
+        # so this only stops a search that could never meet
+        if not s_frontier or not e_frontier:
             return None
 
         # Flag alternates the sides
         if flag == 1:
             # Gets the next frontier
-            next_frontier(s_frontier, s_parents)
-            flag = flag * (-1)
+            s_frontier = next_frontier(s_frontier, s_moves)
         else:
             # Gets the next frontier
-            next_frontier(e_frontier, e_parents)
-            flag = flag * (-1)
-
-        # Checking to see if there is the same block state in each list
-        
-        # Grabs a left element from the starting frontier
-        for l_elm in s_frontier:
-            # Compares it to each of the right elements from the end frontier
-            for r_elm in e_frontier:
-                # If we find an element that matches
-                if l_elm.st == r_elm.st:
-                    # Find the intersect of the two lists
-                    intersect = (l_elm, r_elm)
-                    # We set found to true
-                    found = True
-                    # Then break out of the loop
-                    break
-            # If the element was found we can break out of this loop as well
-            if found == True:
-                break
-    # Creates a lsit for return
-    final_list = []
-    # Temp variable to hold l_elm
-    l_temp = intersect[0]
-    
-    # Gets the parent of l_temp (l_elm) until the start state
-    while (l_temp.st != start):
-        final_list.insert(0, l_temp.parent[0])
-        l_temp = l_temp.parent[1]
-
-    r_temp = intersect[1]
-
-    # Gets the parent of r_temp (r_elm) until the end state
-    # Perm inverse is because we have to do the inverse of each move to get the parent.
-    while (r_temp.st != end):
-        final_list.append(rubik.perm_inverse(r_temp.parent[0]))
-        r_temp = r_temp.parent[1]
+            e_frontier = next_frontier(e_frontier, e_moves)
+        flag = flag * (-1)
+
+        # Checking to see if there is the same block state on each side
+        meet = meeting_state(s_frontier, s_moves, e_frontier, e_moves)
+
+    # The moves from start to the meeting state, then the end side's moves undone
+    # INVERSE is because we have to do the inverse of each move to get from the meeting state to the end.
+    final_list = path_to(meet, s_moves)
+    for m in reversed(path_to(meet, e_moves)):
+        final_list.append(compact.INVERSE[m])
+    return final_list
+
+# The ways shortest_path can find a path, each taking the code of a position
+# and returning move indices that solve it
+METHODS = {
+    "bfs": bfs_path,
+    "table": godtable.solve,
+    "ida": ida.solve,
+}
+
+"""
+Finds the shortest path from start_position to end_position.
+Returns a list of moves, or None if there is none.
+You can use the rubik.quarter_twists move set.
+Each move can be applied using rubik.perm_apply
+method picks how:
+   "bfs"    2-way BFS, nothing precomputed
+   "table"  greedy descent through godtable's table of every distance,
+            which is built and cached on disk the first time
+   "ida"    iterative-deepening A* with ida's pattern tables,
+            which keeps only the current path in memory
+"""
+def shortest_path(start, end, method="bfs"):
+    if method not in METHODS:
+        raise ValueError("unknown method: %r" % (method,))
+    # The moves that take start to end take start * end^-1 to the identity,
+    # which is the only kind of position compact can encode
+    try:
+        start_code = compact.encode(rubik.perm_apply(start, rubik.perm_inverse(end)))
+    except ValueError:
+        # Not reachable with quarter twists, so there is no path
+        return None
+    path = METHODS[method](start_code)
+    if path is None:
+        return None
+    return [compact.MOVES[m] for m in path]
+
+# A batch smaller than this many positions per worker is solved in this process,
+# since starting workers would cost more than it saves
+BATCH_MIN = 5000
 
+# Runs in a worker: solves positions by code with the given method
+# Returns a list of move index lists, one for each code
+def solve_codes(codes, method):
+    return [METHODS[method](code) for code in codes]
+
+"""
+Finds shortest paths for a list of (start, end) pairs at once.
+Returns a list with, for each pair, what shortest_path(start, end, method)
+would return (the path itself may be another one of the same length).
+Each pair is turned into the one position start * end^-1 to be solved,
+so pairs that differ but come to the same position are solved once,
+and the positions left are split over a pool of worker processes.
+With method="table" the table is built (if need be) before the workers
+start, and they all map the same file.
+"""
+def shortest_paths(pairs, method="table", workers=None):
+    if method not in METHODS:
+        raise ValueError("unknown method: %r" % (method,))
+    codes = []
+    for start, end in pairs:
+        try:
+            codes.append(compact.encode(rubik.perm_apply(start, rubik.perm_inverse(end))))
+        except ValueError:
+            codes.append(None)
+    todo = sorted(set(code for code in codes if code is not None))
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(todo) // BATCH_MIN)
+    if method == "table":
+        godtable.table()
+    if workers <= 1:
+        paths = solve_codes(todo, method)
+    else:
+        # A few chunks per worker, so one slow chunk does not hold up the rest
+        size = -(-len(todo) // (workers * 4))
+        chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+        with ProcessPoolExecutor(workers, initializer=godtable.use,
+                                 initargs=(godtable.table_path(),)) as pool:
+            paths = [path for chunk in pool.map(solve_codes, chunks, repeat(method)) for path in chunk]
+
+    solved = dict(zip(todo, paths))
+    final_list = []
+    for code in codes:
+        if code is None or solved[code] is None:
+            final_list.append(None)
+        else:
+            final_list.append([compact.MOVES[m] for m in solved[code]])
     return final_list
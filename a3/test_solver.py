@@ -1,8 +1,15 @@
 #!/usr/bin/python
 import unittest
+import os
+import random
+import tempfile
 import solver
 import rubik
+import compact
+import godtable
+import ida
 import sys
+import zlib
 
 class TestSolver(unittest.TestCase):
     def testShortestPath0(self):
@@ -71,6 +78,155 @@ class TestSolver(unittest.TestCase):
             current = rubik.perm_apply(move, current)
         self.assertEqual(current, end)
 
+class TestCompact(unittest.TestCase):
+    def testRoundTrip(self):
+        """Codes and moves agree with rubik.perm_apply along a random walk."""
+        rng = random.Random(0)
+        position = rubik.I
+        self.assertEqual(compact.encode(position), compact.IDENTITY)
+        for i in range(2000):
+            code = compact.encode(position)
+            self.assertTrue(0 <= code < compact.N_STATES)
+            self.assertEqual(compact.decode(code), position)
+            m = rng.randrange(compact.N_MOVES)
+            position = rubik.perm_apply(compact.MOVES[m], position)
+            self.assertEqual(compact.apply_move(m, code), compact.encode(position))
+            self.assertEqual(compact.neighbours(code)[m], compact.encode(position))
+
+    def testRanks(self):
+        """Every permutation of 7 cubies has its own rank."""
+        ranks = set()
+        for rank in range(compact.N_PERMS):
+            perm = compact.perm_unrank(rank)
+            self.assertEqual(compact.perm_rank(perm), rank)
+            ranks.add(perm)
+        self.assertEqual(len(ranks), compact.N_PERMS)
+
+    def testUnreachable(self):
+        """A single twisted cubie, or a moved cubie 7, cannot be encoded."""
+        twisted = (7, 8, 6) + rubik.I[3:]
+        moved = rubik.I[:18] + rubik.I[21:] + rubik.I[18:21]
+        for position in (twisted, moved, rubik.I[:23]):
+            with self.assertRaises(ValueError):
+                compact.encode(position)
+
+class TestGodTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Built in a temporary file, not the cache next to the code
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "table.bin")
+        cls.saved = godtable.table_path()
+        godtable.use(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        godtable.use(cls.saved)
+        os.remove(cls.path)
+        os.rmdir(cls.directory)
+
+    def testDistances(self):
+        """The solved position is 0 away, the hardest ones 14."""
+        self.assertEqual(godtable.distance(compact.IDENTITY), 0)
+        hardest = (6, 7, 8, 20, 18, 19, 3, 4, 5, 16, 17, 15, 0, 1, 2, 14, 12, 13, 10, 11, 9, 21, 22, 23)
+        self.assertEqual(godtable.distance(compact.encode(hardest)), 14)
+        for code in compact.neighbours(compact.IDENTITY):
+            self.assertEqual(godtable.distance(code), 1)
+
+    def testSameAsBFS(self):
+        """Descending the table finds paths as short as the search does."""
+        rng = random.Random(0)
+        for i in range(50):
+            start = compact.decode(rng.randrange(compact.N_STATES))
+            end = compact.decode(rng.randrange(compact.N_STATES))
+            ans = solver.shortest_path(start, end, method="table")
+            self.assertEqual(len(ans), len(solver.shortest_path(start, end)))
+            current = start
+            for move in ans:
+                current = rubik.perm_apply(move, current)
+            self.assertEqual(current, end)
+        bad = (7, 8, 6) + rubik.I[3:]
+        self.assertEqual(solver.shortest_path(bad, rubik.I, method="table"), None)
+        with self.assertRaises(ValueError):
+            solver.shortest_path(rubik.I, rubik.I, method="guess")
+
+    def testBatch(self):
+        """shortest_paths gives what shortest_path does, pair by pair."""
+        rng = random.Random(1)
+        pairs = [(compact.decode(rng.randrange(compact.N_STATES)), rubik.I) for i in range(60)]
+        pairs += [(rubik.I, compact.decode(rng.randrange(compact.N_STATES))) for i in range(20)]
+        pairs += pairs[:10] + [(rubik.I, rubik.I), ((7, 8, 6) + rubik.I[3:], rubik.I)]
+        expected = [solver.shortest_path(start, end, method="table") for start, end in pairs]
+        minimum = solver.BATCH_MIN
+        solver.BATCH_MIN = 10
+        try:
+            self.assertEqual(solver.shortest_paths(pairs, workers=2), expected)
+        finally:
+            solver.BATCH_MIN = minimum
+        self.assertEqual(solver.shortest_paths(pairs), expected)
+        found = solver.shortest_paths(pairs[:5] + pairs[-2:], method="bfs")
+        self.assertEqual([path and len(path) for path in found],
+                         [path and len(path) for path in expected[:5] + expected[-2:]])
+
+    def testRebuild(self):
+        """A file that is not a whole, good table is built again."""
+        path = os.path.join(self.directory, "bad.bin")
+        ones = b"\x11" * godtable.TABLE_SIZE
+        for data in (b"\0" * 10, ones + b"\0" * 4, ones + zlib.crc32(ones).to_bytes(4, "little")):
+            with open(path, "wb") as output:
+                output.write(data)
+            table = godtable.load(path)
+            try:
+                self.assertEqual(len(table), godtable.TABLE_SIZE)
+                self.assertEqual(table[:], godtable.table()[:])
+            finally:
+                table.close()
+                os.remove(path)
+
+    def testCorrupt(self):
+        """Descending a table with no way down is an error, not a hang."""
+        ones = bytearray(b"\x11") * godtable.TABLE_SIZE
+        code = compact.neighbours(compact.IDENTITY)[0]
+        with self.assertRaises(ValueError):
+            godtable.solve(code, ones)
+
+class TestIDA(unittest.TestCase):
+    def testShortPaths(self):
+        """The same short paths the search finds."""
+        start = rubik.I
+        self.assertEqual(solver.shortest_path(start, start, method="ida"), [])
+        end = rubik.perm_apply(rubik.F, start)
+        self.assertEqual(solver.shortest_path(start, end, method="ida"), [rubik.F])
+        end = rubik.perm_apply(rubik.L, end)
+        self.assertEqual(solver.shortest_path(start, end, method="ida"), [rubik.F, rubik.L])
+
+    def testOptimal(self):
+        """Paths as short as the search finds, and never overestimated."""
+        rng = random.Random(2)
+        for i in range(20):
+            code = rng.randrange(compact.N_STATES)
+            path = ida.solve(code)
+            self.assertEqual(len(path), len(solver.bfs_path(code)))
+            self.assertLessEqual(ida.estimate(code), len(path))
+            for m in path:
+                code = compact.apply_move(m, code)
+            self.assertEqual(code, compact.IDENTITY)
+
+    def testHardest(self):
+        """Length 14 path."""
+        start = (6, 7, 8, 20, 18, 19, 3, 4, 5, 16, 17, 15, 0, 1, 2, 14, 12, 13, 10, 11, 9, 21, 22, 23)
+        ans = solver.shortest_path(start, rubik.I, method="ida")
+        self.assertEqual(len(ans), 14)
+        current = start
+        for move in ans:
+            current = rubik.perm_apply(move, current)
+        self.assertEqual(current, rubik.I)
+        bad = (7, 8, 6) + rubik.I[3:]
+        self.assertEqual(solver.shortest_path(bad, rubik.I, method="ida"), None)
+
 if __name__ == '__main__':
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestSolver)
+    suite = unittest.TestSuite([unittest.TestLoader().loadTestsFromTestCase(TestSolver),
+                                unittest.TestLoader().loadTestsFromTestCase(TestCompact),
+                                unittest.TestLoader().loadTestsFromTestCase(TestGodTable),
+                                unittest.TestLoader().loadTestsFromTestCase(TestIDA)])
     unittest.TextTestRunner(verbosity=2).run(suite)